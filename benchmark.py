@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+"""
+Benchmark harness for weather_monitor.py (no live services needed)
+
+Starts a local HTTP stand-in for:
+- api.weather.gov   (/alerts/active by point, area or national; /points)
+- api.open-meteo.com (/v1/forecast, single and multi-location)
+- ECCC ATOM feeds    (/eccc/<n>.xml)
+with configurable latency, jitter, slow-tail and error rate, then runs the monitor's
+pipeline (run_monitor: fetch, evaluate, reports) against synthetic fleets.
+
+Each size runs in a fresh child process, so imports are cold and peak RSS is
+per run. Reported per size: wall-clock, requests issued, peak RSS, stage timings.
+
+Usage:
+  python benchmark.py                                   # 10/100/1000/10000 sites
+  python benchmark.py --sizes 100,1000 --engine async --latency-ms 80 --jitter-ms 40 --error-rate 0.02
+  HEDGE_MAX_PER_RUN=50 python benchmark.py --sizes 1000 --tail-rate 0.02 --tail-ms 2000   # hedging vs slow tail
+  python benchmark.py --json bench.json                 # save results
+  python benchmark.py --baseline bench.json             # exit 1 on regression vs a saved run
+  python benchmark.py --import-time                     # cold-start import cost only (budget 300 ms)
+
+Monitor settings come from the environment as usual, e.g.
+  NWS_ALERT_MODE=national GRID_SNAP_DEG=0.05 python benchmark.py
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+
+DEFAULT_SIZES = "10,100,1000,10000"
+
+# Rough CONUS box for synthetic sites and alert polygons
+LAT_RANGE = (25.0, 49.0)
+LON_RANGE = (-124.0, -67.0)
+STATES = ["IL", "OH", "PA", "WV", "GA", "TX", "CA", "WI", "MO", "UT", "NC", "IA", "ME", "MA", "IN", "TN", "DE", "AZ"]
+
+
+# =========================
+# MOCK UPSTREAM SERVER
+# =========================
+
+class MockConfig:
+    def __init__(self, latency_ms: float, jitter_ms: float, error_rate: float, alerts: int, seed: int,
+                 tail_rate: float = 0.0, tail_ms: float = 0.0):
+        self.latency = latency_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self.tail_rate = tail_rate
+        self.tail = tail_ms / 1000.0
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.features = synthetic_alert_features(alerts, seed)
+
+
+def synthetic_alert_features(n: int, seed: int) -> List[dict]:
+    """Box-shaped polygon alerts across CONUS, plus every 5th alert zone-based (no geometry)."""
+    rng = random.Random(seed)
+    feats: List[dict] = []
+    for i in range(n):
+        lat = rng.uniform(*LAT_RANGE)
+        lon = rng.uniform(*LON_RANGE)
+        w = rng.uniform(0.2, 2.0)
+        props = {
+            "id": f"urn:oid:bench.{i}",
+            "event": "Winter Storm Warning" if i % 2 else "Winter Weather Advisory",
+            "headline": f"Synthetic alert {i}",
+            "severity": "Moderate",
+            "effective": "2026-01-01T00:00:00Z",
+            "expires": "2026-01-02T00:00:00Z",
+        }
+        if i % 5 == 0:
+            props["geocode"] = {"UGC": [zone_code(lat, lon)]}
+            geometry = None
+        else:
+            ring = [[lon, lat], [lon + w, lat], [lon + w, lat + w], [lon, lat + w], [lon, lat]]
+            geometry = {"type": "Polygon", "coordinates": [ring]}
+        feats.append({"type": "Feature", "properties": props, "geometry": geometry, "_box": (lat, lon, w)})
+    return feats
+
+
+def cell_state(lat: float, lon: float) -> str:
+    """Stand-in state of a 1-degree cell, shared by the sites' addresses and the zone codes."""
+    return STATES[(int(lat) * 61 + int(-lon)) % len(STATES)]
+
+
+def zone_code(lat: float, lon: float) -> str:
+    # Coarse 1-degree UGC "zones" (e.g. TXZ123) so zone-based alerts hit some sites
+    return f"{cell_state(lat, lon)}Z{(int(lat) * 61 + int(-lon)) % 1000:03d}"
+
+
+def synthetic_daily(lat: float, lon: float) -> dict:
+    rng = random.Random(f"{lat:.4f},{lon:.4f}")
+    return {
+        "snowfall_sum": [round(rng.uniform(0, 4) if rng.random() < 0.3 else 0.0, 2) for _ in range(7)],
+        "precipitation_sum": [round(rng.uniform(0, 12), 2) for _ in range(7)],
+        "temperature_2m_min": [round(rng.uniform(-12, 8), 1) for _ in range(7)],
+    }
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config: MockConfig  # set on the server-specific subclass
+
+    def log_message(self, fmt: str, *args: object) -> None:
+        pass
+
+    def _send(self, status: int, body: str, ctype: str = "application/json") -> None:
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        cfg = self.config
+        with cfg.lock:
+            cfg.requests += 1
+            delay = max(0.0, cfg.latency + cfg.rng.uniform(-cfg.jitter, cfg.jitter))
+            if cfg.rng.random() < cfg.tail_rate:
+                delay += cfg.tail
+            fail = cfg.rng.random() < cfg.error_rate
+        time.sleep(delay)
+        if fail:
+            self._send(503, json.dumps({"error": "synthetic failure"}))
+            return
+
+        u = urlsplit(self.path)
+        q = parse_qs(u.query)
+        if u.path == "/alerts/active":
+            self._send(200, json.dumps(self._alerts(q)), "application/geo+json")
+        elif u.path.startswith("/points/"):
+            lat, lon = (float(x) for x in u.path.rsplit("/", 1)[-1].split(","))
+            zone = f"https://api.weather.gov/zones/forecast/{zone_code(lat, lon)}"
+            self._send(200, json.dumps({"properties": {"forecastZone": zone}}), "application/geo+json")
+        elif u.path == "/v1/forecast":
+            lats = [float(x) for x in q["latitude"][0].split(",")]
+            lons = [float(x) for x in q["longitude"][0].split(",")]
+            items = [{"latitude": a, "longitude": b, "daily": synthetic_daily(a, b)} for a, b in zip(lats, lons)]
+            self._send(200, json.dumps(items if len(items) > 1 else items[0]))
+        elif u.path.startswith("/eccc/"):
+            self._send(200, (
+                "<feed xmlns='http://www.w3.org/2005/Atom'>"
+                "<entry><title>Snowfall warning in effect</title></entry>"
+                "<entry><title>No watches or warnings in effect</title></entry>"
+                "</feed>"
+            ), "application/atom+xml")
+        else:
+            self._send(404, json.dumps({"error": "not found"}))
+
+    def _alerts(self, q: Dict[str, List[str]]) -> dict:
+        feats = self.config.features
+        if "point" in q:
+            lat, lon = (float(x) for x in q["point"][0].split(","))
+            hit = []
+            for f in feats:
+                flat, flon, w = f["_box"]
+                if f["geometry"] is None:
+                    if zone_code(lat, lon) in f["properties"]["geocode"]["UGC"]:
+                        hit.append(f)
+                elif flat <= lat <= flat + w and flon <= lon <= flon + w:
+                    hit.append(f)
+            feats = hit
+        # area=XX: the stand-in has no state shapes, so every area gets the national feed
+        return {"type": "FeatureCollection", "features": [{k: v for k, v in f.items() if k != "_box"} for f in feats]}
+
+
+def start_mock_server(config: MockConfig) -> Tuple[ThreadingHTTPServer, str]:
+    handler = type("BoundMockHandler", (MockHandler,), {"config": config})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+# =========================
+# SYNTHETIC FLEET
+# =========================
+
+def synthetic_sites(wm: object, n: int, base_url: str, seed: int, colocated: float = 0.2) -> list:
+    """n sites: ~95% US (some sharing coordinates, like campuses), the rest Canadian with ECCC feeds."""
+    rng = random.Random(seed)
+    sites = []
+    for i in range(n):
+        if sites and rng.random() < colocated:
+            prev = rng.choice(sites)
+            lat, lon, country, address, feed = prev.lat, prev.lon, prev.country, prev.address, prev.eccc_feed_url
+        elif rng.random() < 0.05:
+            lat, lon = rng.uniform(43.0, 49.0), rng.uniform(-95.0, -70.0)
+            country, address, feed = "Canada", "Somewhere, ON A1A 1A1", f"{base_url}/eccc/{i % 20}.xml"
+        else:
+            lat, lon = rng.uniform(*LAT_RANGE), rng.uniform(*LON_RANGE)
+            country, address, feed = "United States", f"{i} Main St, Town, {cell_state(lat, lon)} 00000", ""
+        sites.append(wm.Site(
+            site_name=f"Bench Site {i}",
+            country=country,
+            prime_status="Active",
+            lat=round(lat, 6),
+            lon=round(lon, 6),
+            site_code=f"S{i:05d}",
+            application="PrIME",
+            bu="BENCH",
+            address=address,
+            eccc_feed_url=feed,
+        ))
+    return sites
+
+
+# =========================
+# CHILD: one run
+# =========================
+
+def peak_rss_kb() -> Optional[int]:
+    try:
+        import resource
+    except ImportError:  # not available on Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return int(rss / 1024) if sys.platform == "darwin" else int(rss)  # macOS reports bytes
+
+
+def run_child(size: int, engine: str, base_url: str, seed: int) -> dict:
+    t0 = time.perf_counter()
+    import weather_monitor as wm
+    import_sec = time.perf_counter() - t0
+
+    out_dir = tempfile.mkdtemp(prefix="wm-bench-")
+    wm.OUT_MD = os.path.join(out_dir, "report.md")
+    wm.OUT_CSV = os.path.join(out_dir, "report.csv")
+    sites = synthetic_sites(wm, size, base_url, seed)
+
+    t1 = time.perf_counter()
+    results = wm.run_monitor(sites, engine)
+    wall = time.perf_counter() - t1
+    return {
+        "size": size,
+        "engine": engine,
+        "wall_sec": round(wall, 4),
+        "import_sec": round(import_sec, 4),
+        "requests": wm.RUN_STATS.total_requests(),
+        "requests_by_host": dict(wm.RUN_STATS.requests),
+        "stages": {k: round(v, 4) for k, v in wm.RUN_STATS.stages.items()},
+        "events": dict(wm.RUN_STATS.events),
+        "peak_rss_kb": peak_rss_kb(),
+        "low_confidence": int(results.confidence.eq("LOW").sum()),
+    }
+
+
+# =========================
+# IMPORT TIME (python -X importtime)
+# =========================
+
+# Imported lazily by weather_monitor; seeing one at import time is a startup regression
+LAZY_MODULES = ("asyncio", "aiohttp", "smtplib", "email.mime", "xml.etree", "sqlite3", "zoneinfo", "numpy")
+
+
+def parse_importtime(stderr: str) -> Tuple[Dict[str, int], Dict[str, int]]:
+    """
+    From -X importtime output: cumulative us per module, and per direct import of
+    weather_monitor (children are printed before their parent, indented one level deeper).
+    """
+    cumulative: Dict[str, int] = {}
+    direct: Dict[str, int] = {}
+    pending: Dict[str, int] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cum_us, raw = line[len("import time:"):].split("|", 2)
+        name = raw.strip()
+        depth = (len(raw) - len(raw.lstrip()) - 1) // 2
+        cumulative[name] = int(cum_us)
+        if depth == 1:
+            pending[name] = int(cum_us)
+        elif depth == 0:
+            if name == "weather_monitor":
+                direct = pending
+            pending = {}
+    return cumulative, direct
+
+
+def measure_import_time(runs: int) -> dict:
+    """Median cold import of weather_monitor over fresh interpreters, plus where the time goes."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    totals: List[int] = []
+    modules: Dict[str, int] = {}
+    direct: Dict[str, int] = {}
+    for _ in range(max(1, runs)):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import weather_monitor"],
+            capture_output=True, text=True, cwd=here,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"importing weather_monitor failed:\n{proc.stderr}")
+        modules, direct = parse_importtime(proc.stderr)
+        totals.append(modules["weather_monitor"])
+    totals.sort()
+    heaviest = sorted(direct.items(), key=lambda x: -x[1])[:8]
+    return {
+        "import_ms": round(totals[len(totals) // 2] / 1000.0, 2),
+        "heaviest": [{"module": name, "ms": round(cum / 1000.0, 2)} for name, cum in heaviest],
+        "eager_lazy_modules": [m for m in LAZY_MODULES if m in modules],
+    }
+
+
+def run_import_time(args: argparse.Namespace) -> int:
+    r = measure_import_time(args.runs)
+    print(f"import weather_monitor: {r['import_ms']:.1f} ms (median of {max(1, args.runs)} cold runs)")
+    for h in r["heaviest"]:
+        print(f"  {h['module']:<24} {h['ms']:8.1f} ms")
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump({"argv": sys.argv[1:], "import_time": r}, f, indent=2)
+
+    problems: List[str] = [f"{m} is imported at startup (should be lazy)" for m in r["eager_lazy_modules"]]
+    if args.import_budget_ms and r["import_ms"] > args.import_budget_ms:
+        problems.append(f"import {r['import_ms']:.1f} ms over budget {args.import_budget_ms:.1f} ms")
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            base = json.load(f).get("import_time")
+        if base and r["import_ms"] > base["import_ms"] * (1.0 + args.tolerance):
+            problems.append(f"import {r['import_ms']:.1f} ms vs baseline {base['import_ms']:.1f} ms")
+    for msg in problems:
+        print(f"REGRESSION: {msg}")
+    return 1 if problems else 0
+
+
+# =========================
+# PARENT: orchestrate + report
+# =========================
+
+def run_size(size: int, args: argparse.Namespace, base_url: str) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "NWS_API_BASE": base_url,
+        "OPEN_METEO_API_BASE": base_url,
+        "HTTP_CACHE_DIR": "",       # every run must hit the stand-in
+        "NWS_ZONES_FILE": "",       # ...including the /points zone lookups
+        "TEAMS_WEBHOOK_URL": "",
+        "SMTP_HOST": "",
+    })
+    env.setdefault("RETRY_SLEEP_SEC", "0.05")
+    cmd = [
+        sys.executable, os.path.abspath(__file__), "--child",
+        "--size", str(size), "--engine", args.engine, "--base-url", base_url, "--seed", str(args.seed),
+    ]
+    proc = subprocess.run(cmd, env=env, capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    if proc.returncode != 0:
+        raise RuntimeError(f"benchmark child failed for size={size}:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def format_table(rows: List[dict]) -> str:
+    lines = [
+        "| Sites | Engine | Wall (s) | Requests | Peak RSS (MB) | LOW conf | Stages (s) |",
+        "|---:|---|---:|---:|---:|---:|---|",
+    ]
+    for r in rows:
+        rss = f"{r['peak_rss_kb'] / 1024:.1f}" if r.get("peak_rss_kb") else "n/a"
+        stages = ", ".join(f"{k} {v:.2f}" for k, v in r["stages"].items())
+        lines.append(
+            f"| {r['size']} | {r['engine']} | {r['wall_sec']:.2f} | {r['requests']} | {rss} | "
+            f"{r['low_confidence']} | {stages} |"
+        )
+    return "\n".join(lines)
+
+
+def compare_baseline(rows: List[dict], baseline_path: str, tolerance: float) -> List[str]:
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        base = {(r["size"], r["engine"]): r for r in json.load(f)["results"]}
+    problems: List[str] = []
+    for r in rows:
+        b = base.get((r["size"], r["engine"]))
+        if not b:
+            continue
+        if r["wall_sec"] > b["wall_sec"] * (1.0 + tolerance):
+            problems.append(f"size={r['size']}: wall {r['wall_sec']:.2f}s vs baseline {b['wall_sec']:.2f}s")
+        if r["requests"] > b["requests"]:
+            problems.append(f"size={r['size']}: {r['requests']} requests vs baseline {b['requests']}")
+    return problems
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Benchmark weather_monitor.py against a local mock upstream")
+    p.add_argument("--sizes", default=DEFAULT_SIZES, help=f"comma-separated fleet sizes (default {DEFAULT_SIZES})")
+    p.add_argument("--engine", choices=["thread", "async"], default="thread")
+    p.add_argument("--latency-ms", type=float, default=30.0, help="mean upstream latency per request")
+    p.add_argument("--jitter-ms", type=float, default=10.0, help="uniform +/- jitter on latency")
+    p.add_argument("--tail-rate", type=float, default=0.0, help="fraction of requests that are slow (long tail)")
+    p.add_argument("--tail-ms", type=float, default=0.0, help="extra latency of a slow request")
+    p.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    p.add_argument("--alerts", type=int, default=200, help="synthetic active alerts in the national feed")
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--json", dest="json_out", default="", help="write results to this JSON file")
+    p.add_argument("--baseline", default="", help="compare against a previous --json file")
+    p.add_argument("--tolerance", type=float, default=0.25, help="allowed wall-clock slowdown vs baseline")
+    p.add_argument("--import-time", action="store_true",
+                   help="only measure cold `import weather_monitor` (python -X importtime); no mock runs")
+    p.add_argument("--runs", type=int, default=5, help="fresh interpreters for --import-time (median reported)")
+    p.add_argument("--import-budget-ms", type=float, default=300.0, help="fail --import-time above this (0 = off)")
+    # internal: single run in a child process
+    p.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    p.add_argument("--size", type=int, default=0, help=argparse.SUPPRESS)
+    p.add_argument("--base-url", default="", help=argparse.SUPPRESS)
+    return p.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.child:
+        print(json.dumps(run_child(args.size, args.engine, args.base_url, args.seed)))
+        return 0
+    if args.import_time:
+        return run_import_time(args)
+
+    config = MockConfig(args.latency_ms, args.jitter_ms, args.error_rate, args.alerts, args.seed,
+                        args.tail_rate, args.tail_ms)
+    server, base_url = start_mock_server(config)
+    rows: List[dict] = []
+    try:
+        for size in [int(x) for x in args.sizes.split(",") if x.strip()]:
+            rows.append(run_size(size, args, base_url))
+            print(f"  {size} sites: {rows[-1]['wall_sec']:.2f}s, {rows[-1]['requests']} requests", file=sys.stderr)
+    finally:
+        server.shutdown()
+
+    print(format_table(rows))
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump({"argv": sys.argv[1:], "results": rows}, f, indent=2)
+
+    if args.baseline:
+        problems = compare_baseline(rows, args.baseline, args.tolerance)
+        for msg in problems:
+            print(f"REGRESSION: {msg}")
+        if problems:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -4,8 +4,8 @@ Severe Weather Monitor (2x/day, rolling 7-day)
 
 Fixes:
 - Open-Meteo 'freezing_rain_sum' caused 400 for many locations -> removed.
-- Use one Open-Meteo call per site with widely supported fields:
-  snowfall_sum, precipitation_sum, temperature_2m_min
+- Use one Open-Meteo call per OPEN_METEO_BATCH_SIZE sites (multi-location query) with widely
+  supported fields: snowfall_sum, precipitation_sum, temperature_2m_min
 - Ice accumulation is an ESTIMATE (proxy) based on subfreezing temps + precip.
 - Open-Meteo timeouts no longer fail the entire site; site returns with LOW confidence instead.
 
@@ -17,24 +17,72 @@ Notifications (optional):
 - Microsoft Teams webhook (TEAMS_WEBHOOK_URL)
 - Email via SMTP (SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASS, EMAIL_TO, EMAIL_FROM)
 
+Sites: the embedded SITES_CSV list, or an external registry (SITES_FILE / --sites:
+.csv, .json or .parquet with the same columns), cached parsed in SITES_CACHE_DIR.
+
+History (optional, ARCHIVE_DB=path.db):
+- every run appended to a SQLite archive (per-site series, alerts, risk, confidence)
+- python weather_monitor.py --trend D488 --runs 10
+
+Delta notifications (optional, STATE_FILE=path.json):
+- only risk upgrades/downgrades and new/cleared alerts are sent; nothing when unchanged
+
+Incremental refresh (--incremental / INCREMENTAL=1), for runs more often than 2x/day:
+- CRITICAL/WARNING sites re-fetched every 15 min, HEADSUP hourly, NONE every 4 h
+  (REFRESH_<LEVEL>_MIN); others reuse their last result from LAST_RESULTS_FILE
+
+Daemon (--daemon), instead of the fixed-UTC cron entries:
+- runs at DAEMON_RUN_TIMES (default 06:00,18:00) in LOCAL_TZ_LABEL, DST-aware
+- polls alerts every DAEMON_ALERT_POLL_MIN and runs early when a site gains an alert
+
+Benchmark (local mock upstream, no live calls): python benchmark.py --help
+
 Safe to run with NO secrets:
 - Blank TEAMS_WEBHOOK_URL -> no Teams post
 - Blank SMTP_* / EMAIL_* -> no email
+
+Execution engines (ENGINE env or --engine):
+- thread (default): requests + bounded worker pool (MAX_WORKERS)
+- async: aiohttp on one event loop, in-flight requests capped by ASYNC_MAX_CONCURRENCY
+
+NWS alerts (NWS_ALERT_MODE):
+- point (default): /alerts/active?point=lat,lon per unique site location
+- area / national: one feed per state (from the site address) or one national feed,
+  matched locally by alert polygon, or by UGC zone for alerts without geometry
 """
 
+import argparse
+import contextvars
 import csv
 import json
 import os
+import random
+import re
+import sys
+import threading
 import time
 import datetime as dt
-from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+import hashlib
+import heapq
+import socket
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Deque, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+from urllib.parse import urlsplit
 
 import requests
-import xml.etree.ElementTree as ET
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+if TYPE_CHECKING:
+    import sqlite3
+
+# Only needed on some code paths, so imported where used to keep startup fast:
+# asyncio (ENGINE=async), xml.etree (ECCC feeds), smtplib/email (SMTP), sqlite3 (ARCHIVE_DB),
+# zoneinfo (--daemon), numpy (risk / accumulation math and ResultTable, not needed to start up).
+# python benchmark.py --import-time guards this.
 
 
 # =========================
@@ -77,6 +125,11 @@ ICE_HEADSUP_IN = env_float("ICE_HEADSUP_IN", 0.05)
 ICE_WARNING_IN = env_float("ICE_WARNING_IN", 0.10)
 ICE_CRITICAL_IN = env_float("ICE_CRITICAL_IN", 0.25)
 
+# Optional per-site / per-BU threshold overrides: inline JSON or a path to a JSON file, e.g.
+# {"bu": {"NA SMO": {"SNOW_WARNING_IN": 6}}, "site": {"9665": {"SNOW_HEADSUP_IN": 4, "SNOW_WARNING_IN": 8}}}
+# Site-code entries win over BU entries; anything not overridden uses the globals above.
+RISK_THRESHOLD_OVERRIDES = env_str("RISK_THRESHOLD_OVERRIDES", "")
+
 # Ice proxy tuning:
 # ice_in ≈ (precip_mm / 25.4) * ICE_PROXY_FACTOR  when temp_min <= 0C and snow is low
 ICE_PROXY_FACTOR = env_float("ICE_PROXY_FACTOR", 0.35)
@@ -90,9 +143,82 @@ NWS_USER_AGENT = env_str(
     "PrIME-SevereWeatherMonitor/1.0 (contact: you@company.com)",
 )
 
+# Upstream API roots (override to point at a mirror or the local benchmark stand-in)
+NWS_API_BASE = env_str("NWS_API_BASE", "https://api.weather.gov").rstrip("/")
+OPEN_METEO_API_BASE = env_str("OPEN_METEO_API_BASE", "https://api.open-meteo.com").rstrip("/")
+
 REQUEST_TIMEOUT = env_int("REQUEST_TIMEOUT", 25)
+MAX_RETRIES = env_int("MAX_RETRIES", 4)               # attempts per request
+# Retry back-off: exponential from RETRY_SLEEP_SEC with full jitter, each sleep capped at
+# RETRY_MAX_SLEEP_SEC, and no retry that would end past RETRY_BUDGET_SEC after the first try.
+# Non-retryable 4xx (400, 404, ...) fail at once.
 RETRY_SLEEP_SEC = env_float("RETRY_SLEEP_SEC", 1.2)
-MAX_RETRIES = env_int("MAX_RETRIES", 4)
+RETRY_MAX_SLEEP_SEC = env_float("RETRY_MAX_SLEEP_SEC", 20.0)
+RETRY_BUDGET_SEC = env_float("RETRY_BUDGET_SEC", 45.0)
+
+# Per-host rate limits shared by all fetchers: "host=rps:burst,..." ("*" = other hosts,
+# rps 0 = unlimited). 429/503 Retry-After is honoured (up to RETRY_AFTER_MAX_SEC) and
+# pauses the whole host.
+RATE_LIMITS = env_str("RATE_LIMITS", "api.weather.gov=10:20,api.open-meteo.com=10:20")
+RETRY_AFTER_MAX_SEC = env_float("RETRY_AFTER_MAX_SEC", 60.0)
+
+# Per-host circuit breaker: opens when BREAKER_FAILURE_RATIO of the last BREAKER_WINDOW calls
+# failed (at least BREAKER_MIN_CALLS), fails fast for BREAKER_OPEN_SEC, then probes once.
+# Sites behind an open breaker take the usual LOW-confidence path. Ratio 0 = off.
+BREAKER_FAILURE_RATIO = env_float("BREAKER_FAILURE_RATIO", 0.5)
+BREAKER_MIN_CALLS = env_int("BREAKER_MIN_CALLS", 10)
+BREAKER_WINDOW = env_int("BREAKER_WINDOW", 20)
+BREAKER_OPEN_SEC = env_float("BREAKER_OPEN_SEC", 30.0)
+
+# Run deadline (seconds, 0 = none) for the whole run, and optional per-stage budgets
+# "forecasts=S,alerts=S,notify=S". Fetching stops in time to leave the notify budget
+# (default REQUEST_TIMEOUT) for notifications; unfinished sites get LOW confidence.
+RUN_DEADLINE_SEC = env_float("RUN_DEADLINE_SEC", 0.0)
+STAGE_BUDGETS_SPEC = env_str("STAGE_BUDGETS", "")
+
+# Request hedging: a GET still running after its host's HEDGE_PERCENTILE latency (over the
+# last HEDGE_WINDOW responses, once HEDGE_MIN_SAMPLES exist) is sent once more and the first
+# good response wins. At most HEDGE_MAX_PER_RUN duplicates per run (0 = off).
+HEDGE_MAX_PER_RUN = env_int("HEDGE_MAX_PER_RUN", 0)
+HEDGE_PERCENTILE = env_float("HEDGE_PERCENTILE", 95.0)
+HEDGE_WINDOW = env_int("HEDGE_WINDOW", 200)
+HEDGE_MIN_SAMPLES = env_int("HEDGE_MIN_SAMPLES", 20)
+HEDGE_MIN_DELAY_MS = env_float("HEDGE_MIN_DELAY_MS", 50.0)
+
+# Concurrency: sites evaluated in parallel (1 = serial)
+MAX_WORKERS = env_int("MAX_WORKERS", 8)
+
+# Connection pooling: one keep-alive session shared by every fetcher
+HTTP_POOL_SIZE = env_int("HTTP_POOL_SIZE", max(10, MAX_WORKERS))  # connections kept per host
+HTTP_POOL_HOSTS = env_int("HTTP_POOL_HOSTS", 10)                   # hosts with a cached pool
+HTTP_KEEPALIVE_SEC = env_float("HTTP_KEEPALIVE_SEC", 30.0)         # idle keep-alive (async engine)
+
+# On-disk HTTP cache honouring Cache-Control max-age, revalidated via ETag/Last-Modified ("" = off)
+HTTP_CACHE_DIR = env_str("HTTP_CACHE_DIR", ".http_cache")
+HTTP_CACHE_DEFAULT_TTL_SEC = env_float("HTTP_CACHE_DEFAULT_TTL_SEC", 0.0)  # when upstream sends no max-age
+# Pruned after each run: entries not stored/revalidated for HTTP_CACHE_MAX_AGE_DAYS and past
+# their expiry, then the oldest until the cache fits in HTTP_CACHE_MAX_MB (0 = no limit)
+HTTP_CACHE_MAX_AGE_DAYS = env_float("HTTP_CACHE_MAX_AGE_DAYS", 7.0)
+HTTP_CACHE_MAX_MB = env_float("HTTP_CACHE_MAX_MB", 200.0)
+
+# Execution engine: "thread" (requests + worker pool) or "async" (aiohttp)
+ENGINE = env_str("ENGINE", "thread").lower()
+ASYNC_MAX_CONCURRENCY = env_int("ASYNC_MAX_CONCURRENCY", 200)
+
+# Open-Meteo multi-location batching: sites per forecast request (1 = one call per site)
+OPEN_METEO_BATCH_SIZE = env_int("OPEN_METEO_BATCH_SIZE", 50)
+
+# Co-located sites share fetches: coordinates are rounded to this many decimals (4 ~ 11 m)
+COORD_DEDUP_DECIMALS = env_int("COORD_DEDUP_DECIMALS", 4)
+
+# Optional forecast grid snapping (degrees; 0 = off). Sites in the same cell share one
+# Open-Meteo forecast, e.g. 0.05 (~5 km) roughly matches the regional model grids.
+GRID_SNAP_DEG = env_float("GRID_SNAP_DEG", 0.0)
+
+# NWS alert lookup: "point" (one query per site location), "area" (one feed per state,
+# matched locally) or "national" (one feed for the whole fleet, matched locally)
+NWS_ALERT_MODE = env_str("NWS_ALERT_MODE", "point").lower()
+ALERT_INDEX_CELL_DEG = env_float("ALERT_INDEX_CELL_DEG", 1.0)  # grid cell size for alert polygon lookup
 
 # Optional notifications
 TEAMS_WEBHOOK_URL = env_str("TEAMS_WEBHOOK_URL", "")
@@ -105,13 +231,45 @@ EMAIL_TO = env_str("EMAIL_TO", "")          # comma-separated
 EMAIL_FROM = env_str("EMAIL_FROM", "")
 EMAIL_SUBJECT_PREFIX = env_str("EMAIL_SUBJECT_PREFIX", "[Severe Wx] ")
 
+# Site registry: external .csv / .json / .parquet file ("" = the embedded SITES_CSV below).
+# Parsed registries are cached in SITES_CACHE_DIR, keyed by path + file hash ("" = no cache).
+SITES_FILE = env_str("SITES_FILE", "")
+SITES_CACHE_DIR = env_str("SITES_CACHE_DIR", ".sites_cache")
+# Site point -> NWS UGC zones (static /points lookups for zone-based alerts in area/national
+# mode), persisted so only new sites are looked up ("" = keep in memory only)
+NWS_ZONES_FILE = env_str("NWS_ZONES_FILE", "nws_point_zones.json")
+
 # Output files
 OUT_MD = env_str("OUT_MD", "weather_warning_report.md")
 OUT_CSV = env_str("OUT_CSV", "weather_warning_report.csv")
 
+# Optional run history: SQLite file every run is appended to ("" = off)
+ARCHIVE_DB = env_str("ARCHIVE_DB", "")
+
+# Delta notifications: previous run's per-site risk + alert ids ("" = off, every run
+# sends the full summary). With a state file only changes are sent, and nothing when
+# nothing changed.
+STATE_FILE = env_str("STATE_FILE", "")
+
+# Incremental refresh (INCREMENTAL=1 or --incremental): only sites whose stored result is
+# older than the interval for its risk level are fetched; the rest reuse LAST_RESULTS_FILE.
+INCREMENTAL = env_str("INCREMENTAL", "0").lower() in ("1", "true", "yes")
+LAST_RESULTS_FILE = env_str("LAST_RESULTS_FILE", "weather_last_results.json")
+REFRESH_MINUTES = {
+    "CRITICAL": env_float("REFRESH_CRITICAL_MIN", 15.0),
+    "WARNING": env_float("REFRESH_WARNING_MIN", 15.0),
+    "HEADSUP": env_float("REFRESH_HEADSUP_MIN", 60.0),
+    "NONE": env_float("REFRESH_NONE_MIN", 240.0),
+}
+
+# Daemon mode (--daemon): local wall-clock run times in LOCAL_TZ_LABEL, and how often
+# to poll alerts between runs (0 = never; a site gaining an alert triggers a run)
+DAEMON_RUN_TIMES = env_str("DAEMON_RUN_TIMES", "06:00,18:00")
+DAEMON_ALERT_POLL_MIN = env_float("DAEMON_ALERT_POLL_MIN", 15.0)
+
 
 # =========================
-# SITES (paste/edit freely)
+# SITES (paste/edit freely; fallback when no SITES_FILE registry is given)
 # =========================
 SITES_CSV = r"""site_name,country,prime_status,lat,lon,site_code,application,bu,address,eccc_feed_url
 Brantford - BRMC,Canada,Active,43.164623,-80.341370,7064,PrIME,NA SMO,"59 Fen Ridge Ct. Brantford ON N3V1G2",
@@ -157,8 +315,15 @@ Edwardsville Mixing Center - EDMC,United States,Coming Soon!,38.770279,-90.05012
 # =========================
 # DATA TYPES
 # =========================
+# Slotted (no per-instance __dict__); Site and AlertItem are also frozen, so a parsed
+# alert can be shared by every site it matches. Loaders/parsers intern the repeated
+# strings (country, prime_status, application, bu, alert source/severity).
 
-@dataclass
+def intern_str(s: Optional[str]) -> Optional[str]:
+    return sys.intern(s) if s else s
+
+
+@dataclass(slots=True, frozen=True)
 class Site:
     site_name: str
     country: str
@@ -172,16 +337,17 @@ class Site:
     eccc_feed_url: str = ""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AlertItem:
     title: str
     starts: Optional[str] = None
     ends: Optional[str] = None
     severity: Optional[str] = None
     source: str = ""
+    id: str = ""  # upstream identifier (NWS alert id / ATOM entry id); "" for synthetic failure items
 
 
-@dataclass
+@dataclass(slots=True)
 class SiteResult:
     site_code: str
     site_name: str
@@ -200,369 +366,2685 @@ class SiteResult:
     risk_reason: str
     confidence: str  # HIGH / MEDIUM / LOW
     address: str = ""
+    forecast_lat: Optional[float] = None  # point the forecast was fetched for (snapped grid cell)
+    forecast_lon: Optional[float] = None
 
 
 # =========================
-# HTTP HELPERS
+# RUN STATS (request counts + stage timings)
 # =========================
 
-def http_get_json(url: str, headers: Optional[dict] = None) -> dict:
-    last_err = None
-    for i in range(MAX_RETRIES):
+class RunStats:
+    """
+    Per-run counters: network requests by host and wall-clock per pipeline stage.
+    Printed at the end of main() and read by benchmark.py.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.requests: Dict[str, int] = {}
+        self.stages: Dict[str, float] = {}
+        self.events: Dict[str, int] = {}
+
+    def reset(self) -> None:
+        with self.lock:
+            self.requests = {}
+            self.stages = {}
+            self.events = {}
+
+    def count_request(self, url: str) -> None:
+        host = urlsplit(url).netloc
+        with self.lock:
+            self.requests[host] = self.requests.get(host, 0) + 1
+
+    def count_event(self, name: str) -> None:
+        with self.lock:
+            self.events[name] = self.events.get(name, 0) + 1
+
+    def add_stage(self, name: str, seconds: float) -> None:
+        with self.lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
         try:
-            r = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
-            r.raise_for_status()
-            return r.json()
-        except Exception as e:
-            last_err = e
-            time.sleep(RETRY_SLEEP_SEC * (1 + i))
-    raise RuntimeError(f"GET JSON failed: {url} :: {last_err}")
+            yield
+        finally:
+            self.add_stage(name, time.perf_counter() - t0)
 
+    def total_requests(self) -> int:
+        return sum(self.requests.values())
+
+    def summary(self) -> str:
+        hosts = ", ".join(f"{h}={n}" for h, n in sorted(self.requests.items()))
+        stages = ", ".join(f"{k} {v:.2f}s" for k, v in self.stages.items())
+        line = f"Requests: {self.total_requests()} ({hosts or 'none'}) | Stages: {stages or 'none'}"
+        if self.events:
+            line += " | Events: " + ", ".join(f"{k}={n}" for k, n in sorted(self.events.items()))
+        return line
 
-def http_get_text(url: str, headers: Optional[dict] = None) -> str:
-    last_err = None
-    for i in range(MAX_RETRIES):
-        try:
-            r = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
-            r.raise_for_status()
-            return r.text
-        except Exception as e:
-            last_err = e
-            time.sleep(RETRY_SLEEP_SEC * (1 + i))
-    raise RuntimeError(f"GET TEXT failed: {url} :: {last_err}")
+
+RUN_STATS = RunStats()
 
 
 # =========================
-# SITE LOADING
+# DEADLINES (run deadline + per-stage budgets)
 # =========================
+# The active deadline (time.monotonic() value) lives in a contextvar: asyncio tasks
+# inherit it, and pool_mapper() copies it into worker threads. Every fetch caps its
+# timeout, retries and rate-limit waits at the time remaining, and fails with
+# DeadlineExceeded once it is gone (the site then takes the LOW-confidence path).
 
-def load_sites_from_embedded_csv(csv_text: str) -> List[Site]:
-    reader = csv.DictReader(csv_text.strip().splitlines())
-    sites: List[Site] = []
-    for row in reader:
-        sites.append(
-            Site(
-                site_name=(row.get("site_name") or "").strip(),
-                country=(row.get("country") or "").strip(),
-                prime_status=(row.get("prime_status") or "").strip(),
-                lat=float(row.get("lat") or 0.0),
-                lon=float(row.get("lon") or 0.0),
-                site_code=(row.get("site_code") or "").strip(),
-                application=(row.get("application") or "").strip(),
-                bu=(row.get("bu") or "").strip(),
-                address=(row.get("address") or "").strip(),
-                eccc_feed_url=(row.get("eccc_feed_url") or "").strip(),
-            )
-        )
-    return sites
+_DEADLINE: "contextvars.ContextVar[Optional[float]]" = contextvars.ContextVar("deadline", default=None)
 
 
-# =========================
-# RISK LOGIC
-# =========================
+class DeadlineExceeded(RuntimeError):
+    """The run / stage time budget ran out before this call could be made."""
 
-def classify_risk(snow_in: float, ice_in: float, has_alerts: bool) -> Tuple[str, str]:
-    if has_alerts:
-        return "WARNING", "Active official alert(s) present"
 
-    if snow_in >= SNOW_CRITICAL_IN or ice_in >= ICE_CRITICAL_IN:
-        return "CRITICAL", "Forecast accumulation exceeds critical threshold"
-    if snow_in >= SNOW_WARNING_IN or ice_in >= ICE_WARNING_IN:
-        return "WARNING", "Forecast accumulation exceeds warning threshold"
-    if snow_in >= SNOW_HEADSUP_IN or ice_in >= ICE_HEADSUP_IN:
-        return "HEADSUP", "Forecast accumulation exceeds heads-up threshold"
+def parse_stage_budgets(spec: str) -> Dict[str, float]:
+    budgets: Dict[str, float] = {}
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, value = part.partition("=")
+        try:
+            budgets[name.strip().lower()] = float(value)
+        except ValueError:
+            print(f"Ignoring bad STAGE_BUDGETS entry: {part!r} (expected stage=seconds)")
+    return budgets
 
-    return "NONE", "No alerts and accumulation below thresholds"
 
+def deadline_remaining() -> Optional[float]:
+    """Seconds left before the active deadline (None = no deadline)."""
+    deadline = _DEADLINE.get()
+    return None if deadline is None else deadline - time.monotonic()
 
-# =========================
-# US: NWS ALERTS
-# =========================
 
-def fetch_nws_alerts(lat: float, lon: float) -> List[AlertItem]:
-    url = f"https://api.weather.gov/alerts/active?point={lat:.6f},{lon:.6f}"
-    data = http_get_json(
-        url,
-        headers={"User-Agent": NWS_USER_AGENT, "Accept": "application/geo+json"},
-    )
-    alerts: List[AlertItem] = []
-    for feat in (data.get("features") or [])[:50]:
-        props = feat.get("properties") or {}
-        title = props.get("headline") or props.get("event") or "Alert"
-        starts = props.get("effective") or props.get("onset")
-        ends = props.get("ends") or props.get("expires")
-        severity = props.get("severity")
-        alerts.append(AlertItem(title=title, starts=starts, ends=ends, severity=severity, source="NWS"))
-    return alerts
+@contextmanager
+def deadline_scope(seconds: Optional[float]) -> Iterator[None]:
+    """Tighten the deadline to `seconds` from now for the block (None / <= 0: unchanged)."""
+    if not seconds or seconds <= 0:
+        yield
+        return
+    current = _DEADLINE.get()
+    deadline = time.monotonic() + seconds
+    token = _DEADLINE.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _DEADLINE.reset(token)
 
 
-# =========================
-# OPEN-METEO (single call per site)
-# =========================
+def request_timeout() -> float:
+    """REQUEST_TIMEOUT capped at the time remaining; raises DeadlineExceeded when none is left."""
+    remaining = deadline_remaining()
+    if remaining is None:
+        return float(REQUEST_TIMEOUT)
+    if remaining <= 0:
+        RUN_STATS.count_event("deadline")
+        raise DeadlineExceeded("run deadline reached")
+    return min(float(REQUEST_TIMEOUT), remaining)
 
-def fetch_open_meteo_daily(lat: float, lon: float) -> Dict[str, List[float]]:
+
+def run_deadline_split(deadline_sec: float, budgets: Dict[str, float]) -> Tuple[Optional[float], Optional[float]]:
     """
-    Returns dict of lists length up to 7:
-      - snowfall_sum (cm)
-      - precipitation_sum (mm)
-      - temperature_2m_min (C)
+    (fetch, notify) time budgets under a run deadline; (None, notify stage budget) without one.
+    Notify keeps its budget (default REQUEST_TIMEOUT) and fetching gets the rest; a deadline
+    too short for both is split evenly, with a warning.
     """
-    url = (
-        "https://api.open-meteo.com/v1/forecast"
-        f"?latitude={lat:.6f}&longitude={lon:.6f}"
-        "&daily=snowfall_sum,precipitation_sum,temperature_2m_min"
-        "&forecast_days=7"
-        "&timezone=UTC"
-    )
-    data = http_get_json(url, headers={"Accept": "application/json"})
-    daily = data.get("daily") or {}
-    return {
-        "snowfall_sum": daily.get("snowfall_sum") or [0.0] * 7,
-        "precipitation_sum": daily.get("precipitation_sum") or [0.0] * 7,
-        "temperature_2m_min": daily.get("temperature_2m_min") or [999.0] * 7,
-    }
+    if deadline_sec <= 0:
+        return None, budgets.get("notify")
+    notify = budgets.get("notify", float(REQUEST_TIMEOUT))
+    if deadline_sec - notify < 1.0:
+        print(f"RUN_DEADLINE_SEC={deadline_sec:g} leaves no time to fetch after the {notify:g}s notify "
+              f"budget; splitting it evenly (raise RUN_DEADLINE_SEC or set STAGE_BUDGETS notify=...)")
+        return deadline_sec / 2.0, deadline_sec / 2.0
+    return deadline_sec - notify, notify
 
 
-def snow_cm_to_inches(cm: float) -> float:
-    return max(0.0, float(cm) / 2.54)
+STAGE_BUDGETS = parse_stage_budgets(STAGE_BUDGETS_SPEC)
+FETCH_BUDGET_SEC, NOTIFY_BUDGET_SEC = run_deadline_split(RUN_DEADLINE_SEC, STAGE_BUDGETS)
 
-def mm_to_inches(mm: float) -> float:
-    return max(0.0, float(mm) / 25.4)
 
+# =========================
+# HTTP CACHE (on disk, keyed by URL)
+# =========================
 
-def estimate_ice_inches_proxy(precip_mm: float, snow_cm: float, tmin_c: float) -> float:
-    """
-    Ice proxy:
-    - Only when cold enough (<=0C)
-    - Only when we’re not already calling it snow-heavy (snow_cm small)
-    - Convert precip_mm to inches and multiply by ICE_PROXY_FACTOR
-    - Cap to ICE_PROXY_MAX_IN_PER_DAY
-    """
-    if tmin_c > 0.0:
-        return 0.0
-    if precip_mm <= 0.0:
-        return 0.0
+_CACHE_CONTROL_MAX_AGE_RE = re.compile(r"max-age\s*=\s*(\d+)", re.I)
 
-    # If snow is significant, assume that precip is mostly snow (not glaze ice)
-    snow_in = snow_cm_to_inches(snow_cm)
-    if snow_in >= 1.0:
-        return 0.0
 
-    ice_in = mm_to_inches(precip_mm) * ICE_PROXY_FACTOR
-    return min(max(0.0, ice_in), ICE_PROXY_MAX_IN_PER_DAY)
+def _http_cache_path(url: str) -> str:
+    return os.path.join(HTTP_CACHE_DIR, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
 
 
-def fetch_open_meteo_snow_ice_7d(lat: float, lon: float) -> Tuple[List[float], List[float]]:
-    """
-    Returns daily_snow_in[7], daily_ice_in[7] based on Open-Meteo.
-    Snow: snowfall_sum (cm) -> inches
-    Ice: proxy estimate using precip + temp_min
-    """
-    daily = fetch_open_meteo_daily(lat, lon)
+def http_cache_load(url: str) -> Optional[dict]:
+    if not HTTP_CACHE_DIR:
+        return None
+    try:
+        with open(_http_cache_path(url), "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return entry if entry.get("url") == url else None
 
-    snow_cm = daily["snowfall_sum"][:7]
-    precip_mm = daily["precipitation_sum"][:7]
-    tmin_c = daily["temperature_2m_min"][:7]
 
-    daily_snow_in: List[float] = []
-    daily_ice_in: List[float] = []
+def http_cache_fresh(entry: Optional[dict]) -> bool:
+    return bool(entry) and float(entry.get("expires") or 0.0) > time.time()
 
-    for i in range(7):
-        sc = float(snow_cm[i]) if i < len(snow_cm) else 0.0
-        pm = float(precip_mm[i]) if i < len(precip_mm) else 0.0
-        tc = float(tmin_c[i]) if i < len(tmin_c) else 999.0
 
-        daily_snow_in.append(snow_cm_to_inches(sc))
-        daily_ice_in.append(estimate_ice_inches_proxy(pm, sc, tc))
+def http_cache_validators(entry: Optional[dict]) -> Dict[str, str]:
+    """Conditional request headers for revalidating a stale entry."""
+    out: Dict[str, str] = {}
+    if entry and entry.get("etag"):
+        out["If-None-Match"] = entry["etag"]
+    if entry and entry.get("last_modified"):
+        out["If-Modified-Since"] = entry["last_modified"]
+    return out
 
-    while len(daily_snow_in) < 7:
-        daily_snow_in.append(0.0)
-    while len(daily_ice_in) < 7:
-        daily_ice_in.append(0.0)
 
-    return daily_snow_in[:7], daily_ice_in[:7]
+def _http_cache_ttl(resp_headers: Any) -> Optional[float]:
+    """Freshness lifetime from Cache-Control (None = don't store)."""
+    cc = (resp_headers.get("Cache-Control") or "").lower()
+    if "no-store" in cc:
+        return None
+    if "no-cache" in cc:
+        return 0.0
+    m = _CACHE_CONTROL_MAX_AGE_RE.search(cc)
+    if not m:
+        return HTTP_CACHE_DEFAULT_TTL_SEC
+    try:
+        age = float(resp_headers.get("Age") or 0)
+    except ValueError:
+        age = 0.0
+    return max(0.0, float(m.group(1)) - age)
+
+
+def http_cache_store(url: str, body: str, resp_headers: Any, entry: Optional[dict] = None) -> None:
+    """
+    Store a 200 body (entry=None) or refresh a revalidated entry after a 304.
+    Best-effort: cache I/O problems never fail the request.
+    """
+    if not HTTP_CACHE_DIR:
+        return
+    ttl = _http_cache_ttl(resp_headers)
+    if ttl is None:
+        return
+    now = time.time()
+    new = {
+        "url": url,
+        "body": body,
+        "etag": resp_headers.get("ETag") or (entry or {}).get("etag") or "",
+        "last_modified": resp_headers.get("Last-Modified") or (entry or {}).get("last_modified") or "",
+        "stored": now,
+        "expires": now + ttl,
+    }
+    if not (ttl > 0 or new["etag"] or new["last_modified"]):
+        return  # nothing to reuse or revalidate later
+    path = _http_cache_path(url)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(HTTP_CACHE_DIR, exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(new, f)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+def http_cache_prune() -> int:
+    """
+    Drop entries untouched for HTTP_CACHE_MAX_AGE_DAYS (the file mtime is the last
+    store or revalidation) whose expiry has passed, plus leftover temp files, then
+    the least recently stored entries until the cache fits in HTTP_CACHE_MAX_MB.
+    Returns the number of files removed.
+    """
+    if not HTTP_CACHE_DIR:
+        return 0
+    try:
+        names = os.listdir(HTTP_CACHE_DIR)
+    except OSError:
+        return 0
+    now = time.time()
+    cutoff = now - HTTP_CACHE_MAX_AGE_DAYS * 86400.0
+    keep: List[Tuple[float, int, str]] = []
+    removed = 0
+    for name in names:
+        path = os.path.join(HTTP_CACHE_DIR, name)
+        try:
+            st = os.stat(path)
+            stale = st.st_mtime < cutoff
+            if name.endswith(".json") and stale:
+                with open(path, "r", encoding="utf-8") as f:
+                    stale = float(json.load(f).get("expires") or 0.0) < now
+            if stale or (name.endswith(".tmp") and st.st_mtime < now - 3600):
+                os.remove(path)
+                removed += 1
+            elif name.endswith(".json"):
+                keep.append((st.st_mtime, st.st_size, path))
+        except (OSError, ValueError, AttributeError):
+            continue
+    budget = HTTP_CACHE_MAX_MB * 1024 * 1024
+    total = sum(size for _, size, _ in keep)
+    if budget > 0 and total > budget:
+        for _, size, path in sorted(keep):
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                continue
+            total -= size
+            if total <= budget:
+                break
+    return removed
 
 
 # =========================
-# CANADA (optional): ECCC ATOM feed headlines
+# RATE LIMITING (per-host token buckets)
 # =========================
 
-def fetch_eccc_atom_alert_titles(feed_url: str) -> List[AlertItem]:
-    if not feed_url:
-        return []
-    xml_text = http_get_text(feed_url, headers={"Accept": "application/atom+xml,application/xml,text/xml"})
-    root = ET.fromstring(xml_text)
-
-    ns = {"atom": "http://www.w3.org/2005/Atom"}
-    alerts: List[AlertItem] = []
+class TokenBucket:
+    """
+    `rate` requests/second with bursts up to `burst` (rate <= 0: unlimited).
+    reserve() books a slot and returns how long the caller must wait for it, so
+    the same bucket serves blocking threads and the event loop.
+    """
 
-    for entry in root.findall("atom:entry", ns):
-        title_el = entry.find("atom:title", ns)
-        if title_el is None:
-            continue
-        title = (title_el.text or "").strip()
-        if not title:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        # `updated` is in the future while paused: tokens only accrue once the pause is over
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def reserve(self, max_wait: Optional[float] = None) -> Optional[float]:
+        """Book a slot; None (nothing booked) if the wait would be max_wait or longer."""
+        with self.lock:
+            now = time.monotonic()
+            wait = max(0.0, self.blocked_until - now)
+            if self.rate > 0:
+                self._refill(now)
+                self.tokens -= 1.0
+                wait = max(wait, self.updated - now + max(0.0, -self.tokens) / self.rate)
+            if max_wait is not None and wait >= max_wait:
+                if self.rate > 0:
+                    self.tokens += 1.0
+                return None
+            return wait
+
+    def release(self) -> None:
+        """Give back a slot booked by reserve() that ended up not being used."""
+        with self.lock:
+            if self.rate > 0:
+                self._refill(time.monotonic())
+                self.tokens = min(self.burst, self.tokens + 1.0)
+
+    def try_take(self) -> bool:
+        """Take a token only if one is available right now (no waiting, no debt)."""
+        with self.lock:
+            now = time.monotonic()
+            if now < self.blocked_until:
+                return False
+            if self.rate <= 0:
+                return True
+            self._refill(now)
+            if self.tokens < 1.0:
+                return False
+            self.tokens -= 1.0
+            return True
+
+    def pause(self, seconds: float) -> None:
+        """
+        Hold every caller off for `seconds` (upstream asked us to back off). The token
+        schedule restarts at the end of the pause, so callers queued meanwhile are
+        spaced out at `rate` after it instead of all firing when it ends.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.blocked_until = max(self.blocked_until, now + seconds)
+            if self.rate > 0:
+                self._refill(now)
+                self.tokens = min(self.tokens, self.burst)
+                self.updated = max(self.updated, self.blocked_until)
+
+
+def parse_rate_limits(spec: str) -> Dict[str, Tuple[float, float]]:
+    """"host=rps:burst,..." ("*" = any other host; burst defaults to rps) -> {host: (rps, burst)}."""
+    limits: Dict[str, Tuple[float, float]] = {}
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
             continue
+        try:
+            host, _, value = part.partition("=")
+            rps, _, burst = value.partition(":")
+            limits[host.strip().lower()] = (float(rps), float(burst or rps))
+        except ValueError:
+            print(f"Ignoring bad RATE_LIMITS entry: {part!r} (expected host=rps[:burst])")
+    return limits
+
+
+class RateLimiter:
+    """One token bucket per host, shared by every fetcher (threads and the async engine)."""
+
+    def __init__(self, limits: Dict[str, Tuple[float, float]]):
+        self.limits = limits
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.lock = threading.Lock()
+
+    def bucket(self, url: str) -> TokenBucket:
+        host = urlsplit(url).hostname or ""
+        b = self.buckets.get(host)
+        if b is None:
+            with self.lock:
+                b = self.buckets.get(host)
+                if b is None:
+                    rate, burst = self.limits.get(host, self.limits.get("*", (0.0, 1.0)))
+                    b = self.buckets[host] = TokenBucket(rate, burst)
+        return b
+
+    def reserve(self, url: str) -> float:
+        # a request that can't go out before the deadline doesn't take a token
+        wait = self.bucket(url).reserve(deadline_remaining())
+        if wait is None:
+            RUN_STATS.count_event("deadline")
+            raise DeadlineExceeded(f"run deadline reached while rate-limited on {urlsplit(url).hostname}")
+        return wait
+
+    def acquire(self, url: str) -> None:
+        wait = self.reserve(url)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, url: str) -> None:
+        import asyncio
+
+        wait = self.reserve(url)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def release(self, url: str) -> None:
+        self.bucket(url).release()
+
+    def try_acquire(self, url: str) -> bool:
+        return self.bucket(url).try_take()
+
+    def pause(self, url: str, seconds: float) -> None:
+        self.bucket(url).pause(seconds)
+
+
+RATE_LIMITER = RateLimiter(parse_rate_limits(RATE_LIMITS))
+
+
+def http_error_status(err: Exception) -> Optional[int]:
+    """HTTP status carried by a requests / aiohttp error (None for network errors etc.)."""
+    resp = getattr(err, "response", None)
+    return getattr(resp, "status_code", None) or getattr(err, "status", None)
+
+
+def root_error(err: Exception) -> Exception:
+    """The original error under the GET helpers' "failed after retries" wrappers."""
+    while isinstance(err.__cause__, Exception):
+        err = err.__cause__
+    return err
+
+
+def retry_after_sec(err: Exception) -> Optional[float]:
+    """Retry-After of a 429/503 (requests or aiohttp error), in seconds, capped at RETRY_AFTER_MAX_SEC."""
+    resp = getattr(err, "response", None)
+    headers = getattr(resp, "headers", None) or getattr(err, "headers", None)
+    if http_error_status(err) not in (429, 503) or not headers:
+        return None
+    raw = (headers.get("Retry-After") or "").strip()
+    if not raw:
+        return None
+    try:
+        seconds = float(raw)
+    except ValueError:
+        from email.utils import parsedate_to_datetime
 
-        tl = title.lower()
-        if any(k in tl for k in ["warning", "watch", "advisory", "statement", "special weather", "blizzard", "winter storm", "ice storm"]):
-            alerts.append(AlertItem(title=title, source="ECCC(ATOM)"))
+        try:
+            seconds = (parsedate_to_datetime(raw) - dt.datetime.now(dt.timezone.utc)).total_seconds()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), RETRY_AFTER_MAX_SEC)
 
-    seen = set()
-    uniq: List[AlertItem] = []
-    for a in alerts:
-        if a.title in seen:
-            continue
-        seen.add(a.title)
-        uniq.append(a)
-    return uniq
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    When and how long to wait before retrying a failed GET:
+    - HTTP errors retry only on 408/425/429 and 5xx (except 501); any other 4xx is
+      permanent (bad parameters / schema change), so the request fails at once.
+      Network errors, timeouts and undecodable bodies are retried.
+    - Back-off is exponential with full jitter: uniform(0, min(max_sleep, base * 2**attempt)),
+      or the upstream's Retry-After (which also pauses the host's rate-limit bucket).
+    - No retry is started that would end past budget_sec from the first attempt,
+      or past the run deadline.
+    """
+    attempts: int = MAX_RETRIES
+    base_sec: float = RETRY_SLEEP_SEC
+    max_sleep_sec: float = RETRY_MAX_SLEEP_SEC
+    budget_sec: float = RETRY_BUDGET_SEC
+
+    RETRYABLE_4XX = (408, 425, 429)
+
+    def retryable(self, err: Exception) -> bool:
+        if isinstance(err, (CircuitOpenError, DeadlineExceeded)):
+            return False
+        status = http_error_status(err)
+        if status is None:
+            return True
+        return status in self.RETRYABLE_4XX or (status >= 500 and status != 501)
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0.0, min(self.max_sleep_sec, self.base_sec * (2 ** attempt)))
+
+    def next_delay(self, url: str, err: Exception, attempt: int, started: float) -> Optional[float]:
+        """Seconds to sleep before the next attempt, or None to give up (attempt is 0-based)."""
+        retry_after = retry_after_sec(err)
+        if retry_after is not None:
+            # the host asked every caller to wait, whether or not this request retries
+            RATE_LIMITER.pause(url, retry_after)
+        if attempt + 1 >= self.attempts or not self.retryable(err):
+            return None
+        wait = retry_after if retry_after is not None else self.backoff(attempt)
+        if time.monotonic() - started + wait > self.budget_sec:
+            return None
+        remaining = deadline_remaining()
+        if remaining is not None and wait >= remaining:
+            return None
+        if retry_after is None and http_error_status(err) in (429, 503):
+            RATE_LIMITER.pause(url, wait)
+        return wait
+
+
+RETRY_POLICY = RetryPolicy()
 
 
 # =========================
-# REPORTING
+# CIRCUIT BREAKERS (per upstream host)
 # =========================
 
-def fmt_in(x: float) -> str:
-    return f"{x:.2f}"
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a host whose breaker is open (not retried)."""
 
-def compute_totals(daily: List[float]) -> float:
-    return float(sum(daily))
 
-def render_markdown(results: List[SiteResult]) -> str:
-    now = dt.datetime.utcnow().strftime("%Y-%m-%d %H:%M UTC")
-    flagged = [r for r in results if r.risk_level != "NONE"]
-    critical = [r for r in results if r.risk_level == "CRITICAL"]
-    warning = [r for r in results if r.risk_level == "WARNING"]
-    heads = [r for r in results if r.risk_level == "HEADSUP"]
+def is_host_failure(err: Exception) -> bool:
+    """Errors that say the host is unhealthy: network errors, timeouts, 408 and 5xx."""
+    if isinstance(err, DeadlineExceeded):
+        return False
+    status = http_error_status(err)
+    return status is None or status == 408 or status >= 500
 
-    def summary_line(r: SiteResult) -> str:
-        a = "YES" if r.alerts else "NO"
-        return f"- **{r.site_code} — {r.site_name}** ({r.country}) | Alerts: {a} | Snow: {fmt_in(r.snow_7d_in)} in | Ice: {fmt_in(r.ice_7d_in)} in | **{r.risk_level}**"
 
-    md: List[str] = []
-    md.append("# Severe Weather Monitor — 7-Day Rolling Outlook\n")
-    md.append(f"**Run time:** {now}  ")
-    md.append(f"**Timezone label:** {LOCAL_TZ_LABEL}\n")
-    md.append(f"**Ice method:** Proxy estimate (subfreezing min temp + precipitation). ICE_PROXY_FACTOR={ICE_PROXY_FACTOR}\n")
+class CircuitBreaker:
+    """
+    closed -> open once at least BREAKER_MIN_CALLS of the last BREAKER_WINDOW calls were
+    made and BREAKER_FAILURE_RATIO of them failed; open calls fail fast with
+    CircuitOpenError. After BREAKER_OPEN_SEC one probe is let through (half-open):
+    success closes the breaker, failure re-opens it.
+    """
 
-    md.append("## Executive Summary\n")
-    if not flagged:
-        md.append("No sites flagged (no active alerts and forecast accumulation below thresholds).\n")
-    else:
-        if critical:
-            md.append("### Critical (act now)\n")
-            for r in sorted(critical, key=lambda x: (-(x.snow_7d_in + x.ice_7d_in), x.site_code)):
-                md.append(summary_line(r))
-            md.append("")
-        if warning:
-            md.append("### Warning\n")
-            for r in sorted(warning, key=lambda x: (-(x.snow_7d_in + x.ice_7d_in), x.site_code)):
-                md.append(summary_line(r))
-            md.append("")
-        if heads:
-            md.append("### Heads-up\n")
-            for r in sorted(heads, key=lambda x: (-(x.snow_7d_in + x.ice_7d_in), x.site_code)):
-                md.append(summary_line(r))
-            md.append("")
+    def __init__(self, host: str):
+        self.host = host
+        self.outcomes: Deque[bool] = deque(maxlen=max(1, BREAKER_WINDOW))
+        self.state = "closed"
+        self.opened_at = 0.0
+        self.probing = False
+        self.lock = threading.Lock()
+
+    def check(self) -> None:
+        """Fail fast if a call would be refused now, without claiming the half-open probe."""
+        with self.lock:
+            if self.state == "closed" or BREAKER_FAILURE_RATIO <= 0:
+                return
+            if self.state == "open" and time.monotonic() - self.opened_at < BREAKER_OPEN_SEC:
+                raise CircuitOpenError(f"circuit open for {self.host}")
+            if self.state == "half-open" and self.probing:
+                raise CircuitOpenError(f"circuit half-open for {self.host}, probe in flight")
+
+    def before(self) -> None:
+        with self.lock:
+            if self.state == "closed" or BREAKER_FAILURE_RATIO <= 0:
+                return
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < BREAKER_OPEN_SEC:
+                    raise CircuitOpenError(f"circuit open for {self.host}")
+                self.state = "half-open"
+                self.probing = False
+            if self.probing:
+                raise CircuitOpenError(f"circuit half-open for {self.host}, probe in flight")
+            self.probing = True
+
+    def record(self, ok: Optional[bool]) -> None:
+        """ok=None: the call was abandoned (cancelled) without an answer."""
+        with self.lock:
+            if self.state == "half-open":
+                self.probing = False
+                if ok:
+                    self.state = "closed"
+                    self.outcomes.clear()
+                    print(f"Circuit closed for {self.host} (probe succeeded)")
+                elif ok is False:
+                    self.state = "open"
+                    self.opened_at = time.monotonic()
+                return
+            if self.state == "open" or ok is None:
+                return
+            self.outcomes.append(ok)
+            failures = self.outcomes.count(False)
+            if (BREAKER_FAILURE_RATIO > 0 and len(self.outcomes) >= BREAKER_MIN_CALLS
+                    and failures >= BREAKER_FAILURE_RATIO * len(self.outcomes)):
+                self.state = "open"
+                self.opened_at = time.monotonic()
+                print(f"Circuit opened for {self.host}: {failures}/{len(self.outcomes)} recent calls failed")
+
+    @contextmanager
+    def guard(self) -> Iterator[None]:
+        """
+        Wrap one network call: fail fast when open, record its outcome otherwise.
+        Waits that come before the call (rate limiting) belong outside the guard.
+        """
+        self.before()
+        ok: Optional[bool] = None
+        try:
+            yield
+            ok = True
+        except Exception as e:
+            remaining = deadline_remaining()
+            # a call cut short by (or never sent because of) our own deadline says nothing about the host
+            if isinstance(e, DeadlineExceeded) or (remaining is not None and remaining <= 0):
+                ok = None
+            else:
+                ok = not is_host_failure(e)
+            raise
+        finally:
+            self.record(ok)
 
-    md.append("## Site Table (All)\n")
-    md.append("| Site Code | Site | Country | Alerts | Snow (7d, in) | Ice (7d, in) | Risk | Confidence |")
-    md.append("|---|---|---:|---:|---:|---:|---:|---:|")
-    for r in sorted(results, key=lambda x: x.site_code):
-        md.append(
-            f"| {r.site_code} | {r.site_name} | {r.country} | "
-            f"{'YES' if r.alerts else 'NO'} | {fmt_in(r.snow_7d_in)} | {fmt_in(r.ice_7d_in)} | "
-            f"{r.risk_level} | {r.confidence} |"
-        )
 
-    if flagged:
-        md.append("\n## Details (Flagged Sites)\n")
-        for r in sorted(flagged, key=lambda x: (x.risk_level, -(x.snow_7d_in + x.ice_7d_in))):
-            md.append(f"### {r.site_code} — {r.site_name} ({r.country})")
-            md.append(f"- **Risk:** {r.risk_level} — {r.risk_reason}")
-            md.append(f"- **7-day totals:** Snow {fmt_in(r.snow_7d_in)} in | Ice {fmt_in(r.ice_7d_in)} in")
-            md.append(f"- **Confidence:** {r.confidence}")
-            if r.address:
-                md.append(f"- **Address:** {r.address}")
-
-            if r.alerts:
-                md.append("\n**Active Alerts:**")
-                for a in r.alerts[:10]:
-                    parts = [a.title]
-                    if a.starts:
-                        parts.append(f"start: {a.starts}")
-                    if a.ends:
-                        parts.append(f"end: {a.ends}")
-                    if a.severity:
-                        parts.append(f"severity: {a.severity}")
-                    parts.append(f"source: {a.source}")
-                    md.append("- " + " | ".join(parts))
+class CircuitBreakers:
+    def __init__(self) -> None:
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.lock = threading.Lock()
 
-            md.append("\n**Daily accumulation (next 7 days, UTC buckets):**")
-            md.append("- Snow (in): " + ", ".join(fmt_in(x) for x in r.daily_snow_in))
-            md.append("- Ice  (in): " + ", ".join(fmt_in(x) for x in r.daily_ice_in))
-            md.append("")
-    return "\n".join(md).strip() + "\n"
+    def get(self, url: str) -> CircuitBreaker:
+        host = urlsplit(url).netloc
+        b = self.breakers.get(host)
+        if b is None:
+            with self.lock:
+                b = self.breakers.setdefault(host, CircuitBreaker(host))
+        return b
 
 
-def write_csv(results: List[SiteResult], path: str) -> None:
-    fieldnames = [
-        "site_code", "site_name", "country", "prime_status", "lat", "lon",
-        "risk_level", "risk_reason", "confidence",
-        "snow_7d_in", "ice_7d_in",
-        "alerts_count", "alerts_titles",
-        "daily_snow_in", "daily_ice_in",
-        "address",
-    ]
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=fieldnames)
-        w.writeheader()
-        for r in results:
-            w.writerow({
-                "site_code": r.site_code,
-                "site_name": r.site_name,
-                "country": r.country,
-                "prime_status": r.prime_status,
-                "lat": r.lat,
-                "lon": r.lon,
-                "risk_level": r.risk_level,
-                "risk_reason": r.risk_reason,
-                "confidence": r.confidence,
-                "snow_7d_in": round(r.snow_7d_in, 3),
-                "ice_7d_in": round(r.ice_7d_in, 3),
-                "alerts_count": len(r.alerts),
-                "alerts_titles": " || ".join(a.title for a in r.alerts[:10]),
-                "daily_snow_in": json.dumps([round(x, 3) for x in r.daily_snow_in]),
-                "daily_ice_in": json.dumps([round(x, 3) for x in r.daily_ice_in]),
-                "address": r.address,
-            })
+# Process-wide, so a --daemon keeps a host's breaker state across runs
+CIRCUIT_BREAKERS = CircuitBreakers()
+
+
+def recheck_breaker(breaker: CircuitBreaker, url: str) -> None:
+    """After a rate-limit / slot wait: if the breaker opened meanwhile, refuse and hand the token back."""
+    try:
+        breaker.check()
+    except CircuitOpenError:
+        RATE_LIMITER.release(url)
+        raise
 
 
 # =========================
-# NOTIFICATIONS (optional)
+# REQUEST HEDGING (tail latency)
 # =========================
 
-def send_teams(webhook_url: str, title: str, body: str) -> None:
-    if not webhook_url:
-        return
-    payload = {"text": f"**{title}**\n\n{body[:3500]}"}
-    r = requests.post(webhook_url, json=payload, timeout=REQUEST_TIMEOUT)
-    r.raise_for_status()
+class LatencyWindow:
+    """Recent response times of one host; p95 is recomputed every few samples."""
 
+    def __init__(self, size: int):
+        self.samples: Deque[float] = deque(maxlen=max(1, size))
+        self.cached: Optional[float] = None
+        self.since = 0
+        self.lock = threading.Lock()
 
-def send_email(subject: str, body: str) -> None:
-    if not (SMTP_HOST and EMAIL_TO and EMAIL_FROM):
-        return
+    def add(self, seconds: float) -> None:
+        with self.lock:
+            self.samples.append(seconds)
+            self.since += 1
 
-    msg = MIMEMultipart()
-    msg["From"] = EMAIL_FROM
-    msg["To"] = EMAIL_TO
-    msg["Subject"] = subject
-    msg.attach(MIMEText(body, "plain", "utf-8"))
+    def percentile(self, pct: float) -> Optional[float]:
+        with self.lock:
+            if len(self.samples) < HEDGE_MIN_SAMPLES:
+                return None
+            if self.cached is None or self.since >= 10:
+                ordered = sorted(self.samples)
+                self.cached = ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100.0))]
+                self.since = 0
+            return self.cached
 
-    with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=REQUEST_TIMEOUT) as server:
-        server.starttls()
-        if SMTP_USER and SMTP_PASS:
+
+class Hedger:
+    """
+    Per-host latency history (kept across --daemon runs) and the per-run hedge cap.
+    A GET still running after its host's HEDGE_PERCENTILE latency gets one duplicate;
+    the first good response wins. No hedge is sent when the run's cap is spent, the
+    host has no free rate-limit token, or too few samples exist yet.
+    """
+
+    def __init__(self, max_per_run: int):
+        self.max_per_run = max_per_run
+        self.used = 0
+        self.windows: Dict[str, LatencyWindow] = {}
+        self.lock = threading.Lock()
+
+    def window(self, url: str) -> LatencyWindow:
+        host = urlsplit(url).netloc
+        w = self.windows.get(host)
+        if w is None:
+            with self.lock:
+                w = self.windows.setdefault(host, LatencyWindow(HEDGE_WINDOW))
+        return w
+
+    def reset_run(self) -> None:
+        with self.lock:
+            self.used = 0
+
+    def record(self, url: str, seconds: float) -> None:
+        if self.max_per_run > 0:
+            self.window(url).add(seconds)
+
+    def enabled(self) -> bool:
+        return 0 < self.max_per_run and self.used < self.max_per_run
+
+    def delay(self, url: str) -> Optional[float]:
+        """Seconds to wait before hedging a GET to this host (None = don't hedge, or no p95 yet)."""
+        if not self.enabled():
+            return None
+        p = self.window(url).percentile(HEDGE_PERCENTILE)
+        return None if p is None else max(p, HEDGE_MIN_DELAY_MS / 1000.0)
+
+    def take(self, url: str) -> bool:
+        """Book one hedge for this run, if the cap and the host's rate limit allow it."""
+        with self.lock:
+            if self.used >= self.max_per_run:
+                return False
+            self.used += 1
+        if not RATE_LIMITER.try_acquire(url):
+            with self.lock:
+                self.used -= 1
+            return False
+        RUN_STATS.count_event("hedge")
+        return True
+
+
+HEDGER = Hedger(HEDGE_MAX_PER_RUN)
+_HEDGE_POOL: Optional[ThreadPoolExecutor] = None
+
+
+def hedge_pool() -> ThreadPoolExecutor:
+    """Threads for the hedge copies of sync GETs (the primary runs on the caller's thread)."""
+    global _HEDGE_POOL
+    if _HEDGE_POOL is None:
+        with _SESSION_LOCK:
+            if _HEDGE_POOL is None:
+                # 1 per fetch worker, plus room for losing copies still finishing in the background
+                _HEDGE_POOL = ThreadPoolExecutor(max_workers=2 * max(1, MAX_WORKERS), thread_name_prefix="hedge")
+    return _HEDGE_POOL
+
+
+class HedgeTimers:
+    """One thread that starts hedges when their delay is up, so a waiting GET holds no extra thread."""
+
+    def __init__(self) -> None:
+        self.heap: List[Tuple[float, int, Any]] = []
+        self.seq = 0
+        self.cond = threading.Condition()
+        self.thread: Optional[threading.Thread] = None
+
+    def call_at(self, when: float, fn: Any) -> None:
+        with self.cond:
+            self.seq += 1
+            heapq.heappush(self.heap, (when, self.seq, fn))
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="hedge-timer", daemon=True)
+                self.thread.start()
+            self.cond.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self.cond:
+                while not self.heap or self.heap[0][0] > time.monotonic():
+                    self.cond.wait(self.heap[0][0] - time.monotonic() if self.heap else None)
+                _, _, fn = heapq.heappop(self.heap)
+            try:
+                fn()
+            except Exception as e:
+                print(f"Hedge launch failed: {e}")
+
+
+HEDGE_TIMERS = HedgeTimers()
+_INFLIGHT = threading.local()  # .get: the HedgedGet whose primary runs on this thread
+
+
+class HedgedGet:
+    """
+    One sync GET with a possible hedge. The primary runs on the caller's thread; the
+    hedge, started by HEDGE_TIMERS, runs on hedge_pool. A hedge that answers first
+    shuts down the primary's socket (tracked through the session's connection pools),
+    so the caller stops waiting on the slow copy and returns the hedge's response.
+    """
+
+    def __init__(self, url: str, req_headers: dict):
+        self.url = url
+        self.req_headers = req_headers
+        self.ctx = contextvars.copy_context()
+        self.lock = threading.RLock()  # a hedge that is already done runs its callback inside launch()
+        self.primary_done = False
+        self.aborted = False
+        self.conn: Any = None  # the primary's connection while its request is in flight
+        self.hedge: Optional[Future] = None
+
+    def attach(self, conn: Any) -> None:
+        with self.lock:
+            if not self.primary_done:
+                self.conn = conn
+
+    def detach(self, conn: Any) -> None:
+        with self.lock:
+            if self.conn is conn:
+                self.conn = None
+
+    def launch(self) -> None:
+        with self.lock:
+            if self.primary_done or not HEDGER.take(self.url):
+                return
+            self.hedge = hedge_pool().submit(self.ctx.copy().run, _send, self.url, self.req_headers)
+            self.hedge.add_done_callback(self._hedge_done)
+
+    def _hedge_done(self, fut: Future) -> None:
+        if fut.cancelled() or fut.exception() is not None:
+            return
+        with self.lock:
+            sock = getattr(self.conn, "sock", None)
+            if self.primary_done or sock is None:
+                return
+            self.aborted = True
+            try:
+                # the plain-socket shutdown also unblocks a TLS read on the caller's thread
+                socket.socket.shutdown(sock, socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def finish(self) -> Optional[Future]:
+        """The primary is over: stop tracking it; returns the hedge, if one was sent."""
+        with self.lock:
+            self.primary_done = True
+            self.conn = None
+            return self.hedge
+
+
+def _track_conn(conn: Any) -> None:
+    get = getattr(_INFLIGHT, "get", None)
+    if get is not None and conn is not None:
+        get.attach(conn)
+        conn.hedged_get = get
+
+
+def _untrack_conn(conn: Any) -> None:
+    get = getattr(conn, "hedged_get", None)
+    if get is not None:
+        get.detach(conn)
+        conn.hedged_get = None
+
+
+class TrackedHTTPConnectionPool(HTTPConnectionPool):
+    """Lets a HedgedGet see the connection its primary is using, until it goes back to the pool."""
+
+    def _get_conn(self, timeout: Optional[float] = None) -> Any:
+        conn = super()._get_conn(timeout)
+        _track_conn(conn)
+        return conn
+
+    def _put_conn(self, conn: Any) -> None:
+        _untrack_conn(conn)
+        super()._put_conn(conn)
+
+
+class TrackedHTTPSConnectionPool(HTTPSConnectionPool):
+    _get_conn = TrackedHTTPConnectionPool._get_conn
+    _put_conn = TrackedHTTPConnectionPool._put_conn
+
+
+# =========================
+# HTTP HELPERS
+# =========================
+
+_SESSION: Optional[requests.Session] = None
+_SESSION_LOCK = threading.Lock()
+
+
+def http_session() -> requests.Session:
+    """
+    Process-wide requests session: per-host keep-alive pools (HTTP_POOL_HOSTS hosts x
+    HTTP_POOL_SIZE connections), so repeat calls to the same upstream skip the TCP/TLS
+    handshake. requests already advertises gzip/deflate and decodes transparently.
+    """
+    global _SESSION
+    if _SESSION is None:
+        with _SESSION_LOCK:
+            if _SESSION is None:
+                s = requests.Session()
+                adapter = HTTPAdapter(pool_connections=HTTP_POOL_HOSTS, pool_maxsize=HTTP_POOL_SIZE)
+                if HEDGER.max_per_run > 0:
+                    adapter.poolmanager.pool_classes_by_scheme = {
+                        "http": TrackedHTTPConnectionPool, "https": TrackedHTTPSConnectionPool,
+                    }
+                s.mount("https://", adapter)
+                s.mount("http://", adapter)
+                _SESSION = s
+    return _SESSION
+
+
+def _send(url: str, req_headers: dict) -> requests.Response:
+    """One network GET (2xx or 304, anything else raises), timed for the host's latency window."""
+    RUN_STATS.count_request(url)
+    t0 = time.monotonic()
+    r = http_session().get(url, headers=req_headers, timeout=request_timeout())
+    HEDGER.record(url, time.monotonic() - t0)
+    if r.status_code != 304:
+        r.raise_for_status()
+    return r
+
+
+def _hedged_send(url: str, req_headers: dict) -> requests.Response:
+    """_send(), duplicated once if it outlasts the host's hedge delay; the first good response wins."""
+    delay = HEDGER.delay(url)
+    if delay is None:
+        return _send(url, req_headers)
+    get = HedgedGet(url, req_headers)
+    HEDGE_TIMERS.call_at(time.monotonic() + delay, get.launch)
+    _INFLIGHT.get = get
+    t0 = time.monotonic()
+    err: Optional[Exception] = None
+    try:
+        r = _send(url, req_headers)
+    except Exception as e:
+        err = e
+    finally:
+        _INFLIGHT.get = None
+        hedge = get.finish()
+    if err is None:
+        return r  # a hedge still running finishes in the background and is dropped
+    if hedge is None:
+        raise err
+    if get.aborted:
+        HEDGER.record(url, time.monotonic() - t0)  # the cut-off primary's time so far (a lower bound)
+    try:
+        r = hedge.result()
+    except Exception:
+        raise err
+    RUN_STATS.count_event("hedge_won")
+    return r
+
+
+def _http_get_body(url: str, headers: Optional[dict]) -> str:
+    """
+    One GET through the on-disk cache: fresh entries skip the network, stale
+    ones are revalidated with If-None-Match / If-Modified-Since.
+    """
+    entry = http_cache_load(url)
+    if http_cache_fresh(entry):
+        return entry["body"]
+    req_headers = dict(headers or {})
+    req_headers.update(http_cache_validators(entry))
+    request_timeout()
+    breaker = CIRCUIT_BREAKERS.get(url)
+    breaker.check()  # don't spend a rate-limit token on a call the breaker will refuse
+    RATE_LIMITER.acquire(url)
+    recheck_breaker(breaker, url)
+    with breaker.guard():
+        r = _hedged_send(url, req_headers)
+        if r.status_code == 304 and entry:
+            http_cache_store(url, entry["body"], r.headers, entry)
+            return entry["body"]
+    http_cache_store(url, r.text, r.headers)
+    return r.text
+
+
+def http_get_json(url: str, headers: Optional[dict] = None) -> dict:
+    last_err = None
+    started = time.monotonic()
+    for i in range(RETRY_POLICY.attempts):
+        try:
+            return json.loads(_http_get_body(url, headers))
+        except Exception as e:
+            last_err = e
+            wait = RETRY_POLICY.next_delay(url, e, i, started)
+            if wait is None:
+                break
+            time.sleep(wait)
+    raise RuntimeError(f"GET JSON failed: {url} :: {last_err}") from last_err
+
+
+def http_get_text(url: str, headers: Optional[dict] = None) -> str:
+    last_err = None
+    started = time.monotonic()
+    for i in range(RETRY_POLICY.attempts):
+        try:
+            return _http_get_body(url, headers)
+        except Exception as e:
+            last_err = e
+            wait = RETRY_POLICY.next_delay(url, e, i, started)
+            if wait is None:
+                break
+            time.sleep(wait)
+    raise RuntimeError(f"GET TEXT failed: {url} :: {last_err}") from last_err
+
+
+class AsyncHttpClient:
+    """
+    Async counterpart of http_get_json/http_get_text.
+    - One shared aiohttp session per run
+    - Semaphore caps in-flight requests (slots are not held during retry sleeps)
+    - Same RATE_LIMITER buckets, CIRCUIT_BREAKERS, RETRY_POLICY and HEDGER, but with non-blocking sleeps
+    - Same on-disk HTTP cache and conditional revalidation
+    """
+
+    def __init__(self, session: Any, max_concurrency: int):
+        import asyncio
+
+        self.session = session
+        self.sem = asyncio.Semaphore(max(1, max_concurrency))
+        # hedges get their own small pool of slots: when a run queues more requests than
+        # max_concurrency, a hedge waiting behind them in self.sem would arrive too late
+        self.hedge_sem = asyncio.Semaphore(max(1, max_concurrency // 10))
+
+    async def _get(self, url: str, headers: Optional[dict]) -> str:
+        import asyncio
+
+        # cache reads/writes are file I/O + JSON: keep them off the event loop
+        entry = await asyncio.to_thread(http_cache_load, url) if HTTP_CACHE_DIR else None
+        if http_cache_fresh(entry):
+            return entry["body"]
+        req_headers = dict(headers or {})
+        req_headers.update(http_cache_validators(entry))
+        request_timeout()
+        breaker = CIRCUIT_BREAKERS.get(url)
+        breaker.check()
+        # wait for the host's rate limit before taking an in-flight slot; every request
+        # starts at once here, so the breaker may open during either wait: look again
+        # after each, and hand back the token of a call that won't be sent
+        await RATE_LIMITER.acquire_async(url)
+        recheck_breaker(breaker, url)
+        async with self.sem:
+            recheck_breaker(breaker, url)
+            with breaker.guard():
+                r, body = await self._hedged_send(url, req_headers)
+        revalidated = r.status == 304 and entry
+        if revalidated:
+            body = entry["body"]
+        if HTTP_CACHE_DIR:
+            await asyncio.to_thread(http_cache_store, url, body, r.headers, entry if revalidated else None)
+        return body
+
+    async def _send(self, url: str, req_headers: dict) -> Tuple[Any, str]:
+        """One network GET (2xx or 304, anything else raises) -> (response, body). Caller holds a slot."""
+        import asyncio
+
+        RUN_STATS.count_request(url)
+        kwargs: Dict[str, Any] = {}
+        if deadline_remaining() is not None:
+            import aiohttp
+
+            kwargs["timeout"] = aiohttp.ClientTimeout(total=request_timeout())
+        t0 = time.monotonic()
+        try:
+            async with self.session.get(url, headers=req_headers, **kwargs) as r:
+                if r.status == 304:
+                    body = ""
+                else:
+                    r.raise_for_status()
+                    body = await r.text()
+        except asyncio.CancelledError:
+            # a losing hedge copy: its time so far still goes in the window (a lower bound),
+            # or the slow samples that trigger hedges would never be seen
+            HEDGER.record(url, time.monotonic() - t0)
+            raise
+        HEDGER.record(url, time.monotonic() - t0)
+        return r, body
+
+    async def _hedged_send(self, url: str, req_headers: dict) -> Tuple[Any, str]:
+        """
+        Async _hedged_send() (caller holds a slot): the hedge takes a hedge slot only if
+        one is free (never waits for one), and the losing copy is cancelled. Every request
+        starts at once here, so the host's p95 is re-read while the first copy runs rather
+        than only when it starts.
+        """
+        import asyncio
+
+        if not HEDGER.enabled():
+            return await self._send(url, req_headers)
+        primary = asyncio.ensure_future(self._send(url, req_headers))
+        tasks = [primary]
+        try:
+            started = time.monotonic()
+            while True:
+                delay = HEDGER.delay(url)
+                if delay is None and not HEDGER.enabled():
+                    return await primary
+                pause = HEDGE_MIN_DELAY_MS / 1000.0 if delay is None else started + delay - time.monotonic()
+                done, _ = await asyncio.wait({primary}, timeout=max(0.0, pause))
+                if done:
+                    return primary.result()
+                if delay is not None and time.monotonic() >= started + delay:
+                    break
+            if self.hedge_sem.locked() or not HEDGER.take(url):
+                return await primary
+            await self.hedge_sem.acquire()  # free (checked above), so this does not block
+            hedge = asyncio.ensure_future(self._send(url, req_headers))
+            hedge.add_done_callback(lambda _: self.hedge_sem.release())
+            tasks.append(hedge)
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            RUN_STATS.count_event("hedge_won")
+                        return task.result()
+            return primary.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()  # mark a losing copy's error as seen
+
+    async def get_text(self, url: str, headers: Optional[dict] = None) -> str:
+        import asyncio
+
+        last_err = None
+        started = time.monotonic()
+        for i in range(RETRY_POLICY.attempts):
+            try:
+                return await self._get(url, headers)
+            except Exception as e:
+                last_err = e
+                wait = RETRY_POLICY.next_delay(url, e, i, started)
+                if wait is None:
+                    break
+                await asyncio.sleep(wait)
+        raise RuntimeError(f"GET TEXT failed: {url} :: {last_err}") from last_err
+
+    async def get_json(self, url: str, headers: Optional[dict] = None) -> dict:
+        import asyncio
+
+        last_err = None
+        started = time.monotonic()
+        for i in range(RETRY_POLICY.attempts):
+            try:
+                # NWS serves application/geo+json, so decode ourselves rather than r.json()
+                return json.loads(await self._get(url, headers))
+            except Exception as e:
+                last_err = e
+                wait = RETRY_POLICY.next_delay(url, e, i, started)
+                if wait is None:
+                    break
+                await asyncio.sleep(wait)
+        raise RuntimeError(f"GET JSON failed: {url} :: {last_err}") from last_err
+
+
+# =========================
+# SITE LOADING
+# =========================
+
+SITE_FIELDS = ("site_name", "country", "prime_status", "lat", "lon", "site_code",
+               "application", "bu", "address", "eccc_feed_url")
+SITES_CACHE_VERSION = 2  # bump when Site, the row validation or the cache layout changes
+
+
+def _cell(row: Dict[str, Any], name: str) -> str:
+    v = row.get(name)
+    return "" if v is None else str(v).strip()
+
+
+def site_from_row(row: Dict[str, Any]) -> Site:
+    return Site(
+        site_name=_cell(row, "site_name"),
+        country=intern_str(_cell(row, "country")),
+        prime_status=intern_str(_cell(row, "prime_status")),
+        lat=float(_cell(row, "lat") or 0.0),
+        lon=float(_cell(row, "lon") or 0.0),
+        site_code=_cell(row, "site_code"),
+        application=intern_str(_cell(row, "application")),
+        bu=intern_str(_cell(row, "bu")),
+        address=_cell(row, "address"),
+        eccc_feed_url=_cell(row, "eccc_feed_url"),
+    )
+
+
+def load_sites_from_embedded_csv(csv_text: str) -> List[Site]:
+    reader = csv.DictReader(csv_text.strip().splitlines())
+    return [site_from_row(row) for row in reader]
+
+
+def read_site_rows(path: str, data: bytes) -> List[Dict[str, Any]]:
+    """Raw registry rows from a .csv, .json (list of objects, or {"sites": [...]}) or .parquet file."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return list(csv.DictReader(data.decode("utf-8-sig").splitlines()))
+    if ext == ".json":
+        doc = json.loads(data.decode("utf-8"))
+        rows = doc.get("sites") if isinstance(doc, dict) else doc
+        if not isinstance(rows, list):
+            raise ValueError(f"{path}: expected a list of site objects")
+        return rows
+    if ext == ".parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError("Parquet site registries require pyarrow (pip install pyarrow)") from e
+        import io
+
+        return pq.read_table(io.BytesIO(data)).to_pylist()
+    raise ValueError(f"{path}: unsupported site registry format (use .csv, .json or .parquet)")
+
+
+def validate_site_rows(path: str, rows: List[Dict[str, Any]]) -> List[Site]:
+    """Sites from registry rows; rows without a name/code or with bad coordinates are reported and skipped."""
+    sites: List[Site] = []
+    for n, row in enumerate(rows, start=1):
+        try:
+            if not isinstance(row, dict):
+                raise ValueError("not an object")
+            site = site_from_row(row)
+            if not (site.site_name or site.site_code):
+                raise ValueError("missing site_name and site_code")
+            if not (-90.0 <= site.lat <= 90.0 and -180.0 <= site.lon <= 180.0):
+                raise ValueError(f"coordinates out of range ({site.lat}, {site.lon})")
+        except (TypeError, ValueError) as e:
+            print(f"Skipping site row {n} in {path}: {e}")
+            continue
+        sites.append(site)
+    return sites
+
+
+def sites_cache_key(path: str) -> str:
+    """Which registry a cache file belongs to (its absolute path, hashed)."""
+    return hashlib.sha256(os.path.abspath(path).encode("utf-8")).hexdigest()[:16]
+
+
+def sites_cache_path(key: str, digest: str) -> str:
+    return os.path.join(SITES_CACHE_DIR, f"sites-v{SITES_CACHE_VERSION}-{key}-{digest}.json")
+
+
+def load_sites_cache(key: str, digest: str) -> Optional[List[Site]]:
+    try:
+        with open(sites_cache_path(key, digest), "r", encoding="utf-8") as f:
+            doc = json.load(f)
+        if doc.get("fields") != list(SITE_FIELDS):
+            raise ValueError("unexpected columns")
+        cols = dict(zip(SITE_FIELDS, doc["columns"]))
+        if len({len(c) for c in cols.values()}) > 1:
+            raise ValueError("columns differ in length")
+        for name in ("country", "prime_status", "application", "bu"):
+            cols[name] = [intern_str(v) for v in cols[name]]
+        # values were validated before caching; SITE_FIELDS is Site's field order
+        return [Site(*values) for values in zip(*(cols[name] for name in SITE_FIELDS))]
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"Ignoring unreadable site cache: {e}")
+        return None
+
+
+def store_sites_cache(key: str, digest: str, sites: List[Site]) -> None:
+    """Column-wise JSON; this registry's older versions (and pre-JSON pickle caches) are pruned."""
+    try:
+        os.makedirs(SITES_CACHE_DIR, exist_ok=True)
+        path = sites_cache_path(key, digest)
+        columns = [[getattr(s, name) for s in sites] for name in SITE_FIELDS]
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"fields": list(SITE_FIELDS), "columns": columns}, f, separators=(",", ":"))
+        os.replace(tmp, path)
+        for name in os.listdir(SITES_CACHE_DIR):
+            mine = f"-{key}-" in name and name.endswith(".json")
+            stale = name.startswith("sites-") and (mine or name.endswith(".pickle"))
+            if stale and os.path.join(SITES_CACHE_DIR, name) != path:
+                os.remove(os.path.join(SITES_CACHE_DIR, name))
+    except OSError as e:
+        print(f"Could not write site cache: {e}")
+
+
+def load_sites(path: str = "") -> List[Site]:
+    """
+    Sites from an external registry (path or SITES_FILE), else the embedded SITES_CSV.
+    The parsed registry is cached in SITES_CACHE_DIR keyed by the file's SHA-256, so
+    an unchanged registry skips parsing and validation.
+    """
+    path = path or SITES_FILE
+    if not path:
+        return load_sites_from_embedded_csv(SITES_CSV)
+    with open(path, "rb") as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+    key = sites_cache_key(path)
+    if SITES_CACHE_DIR:
+        cached = load_sites_cache(key, digest)
+        if cached is not None:
+            return cached
+    sites = validate_site_rows(path, read_site_rows(path, data))
+    if SITES_CACHE_DIR:
+        store_sites_cache(key, digest, sites)
+    return sites
+
+
+# =========================
+# RISK LOGIC
+# =========================
+
+def classify_risk(snow_in: float, ice_in: float, has_alerts: bool) -> Tuple[str, str]:
+    if has_alerts:
+        return "WARNING", "Active official alert(s) present"
+
+    if snow_in >= SNOW_CRITICAL_IN or ice_in >= ICE_CRITICAL_IN:
+        return "CRITICAL", "Forecast accumulation exceeds critical threshold"
+    if snow_in >= SNOW_WARNING_IN or ice_in >= ICE_WARNING_IN:
+        return "WARNING", "Forecast accumulation exceeds warning threshold"
+    if snow_in >= SNOW_HEADSUP_IN or ice_in >= ICE_HEADSUP_IN:
+        return "HEADSUP", "Forecast accumulation exceeds heads-up threshold"
+
+    return "NONE", "No alerts and accumulation below thresholds"
+
+
+# Code tables for the batch classifier (index = code)
+RISK_LEVELS = ("NONE", "HEADSUP", "WARNING", "CRITICAL")
+RISK_REASONS = (
+    "No alerts and accumulation below thresholds",
+    "Forecast accumulation exceeds heads-up threshold",
+    "Forecast accumulation exceeds warning threshold",
+    "Forecast accumulation exceeds critical threshold",
+    "Active official alert(s) present",
+)
+REASON_ALERTS = 4
+
+THRESHOLD_NAMES = (
+    "SNOW_HEADSUP_IN", "SNOW_WARNING_IN", "SNOW_CRITICAL_IN",
+    "ICE_HEADSUP_IN", "ICE_WARNING_IN", "ICE_CRITICAL_IN",
+)
+
+
+def global_thresholds() -> Dict[str, float]:
+    return {name: float(globals()[name]) for name in THRESHOLD_NAMES}
+
+
+_OVERRIDES_CACHE: Optional[Tuple[str, dict]] = None
+
+
+def load_threshold_overrides() -> dict:
+    """
+    Parsed RISK_THRESHOLD_OVERRIDES ({"bu": {...}, "site": {...}}), cached per value.
+    Bad config is reported and ignored, like the other env settings.
+    """
+    global _OVERRIDES_CACHE
+    raw = RISK_THRESHOLD_OVERRIDES
+    if _OVERRIDES_CACHE is not None and _OVERRIDES_CACHE[0] == raw:
+        return _OVERRIDES_CACHE[1]
+    parsed: dict = {}
+    if raw:
+        try:
+            if raw.lstrip().startswith("{"):
+                data = json.loads(raw)
+            else:
+                with open(raw, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            for scope in ("bu", "site"):
+                parsed[scope] = {
+                    str(k).strip().lower(): {str(n).upper(): float(v) for n, v in (vals or {}).items() if str(n).upper() in THRESHOLD_NAMES}
+                    for k, vals in (data.get(scope) or {}).items()
+                }
+        except Exception as e:
+            print(f"Ignoring RISK_THRESHOLD_OVERRIDES: {e}")
+            parsed = {}
+    _OVERRIDES_CACHE = (raw, parsed)
+    return parsed
+
+
+def thresholds_for_sites(sites: List["Site"]) -> Optional[Dict[str, Any]]:
+    """
+    Per-site threshold arrays (THRESHOLD_NAMES -> float array aligned with sites),
+    or None when no overrides are configured (the globals then apply to all).
+    """
+    import numpy as np
+
+    overrides = load_threshold_overrides()
+    if not (overrides.get("bu") or overrides.get("site")):
+        return None
+    base = global_thresholds()
+    cols = {name: np.full(len(sites), base[name]) for name in THRESHOLD_NAMES}
+    for i, s in enumerate(sites):
+        for scope, key in (("bu", s.bu), ("site", s.site_code)):  # site applied last, so it wins
+            for name, v in overrides.get(scope, {}).get(key.strip().lower(), {}).items():
+                cols[name][i] = v
+    return cols
+
+
+def classify_risk_batch(snow_in: Any, ice_in: Any, has_alerts: Any, thresholds: Optional[Dict[str, Any]] = None) -> Tuple[Any, Any]:
+    """
+    Vectorized classify_risk over aligned arrays. Returns (level codes into
+    RISK_LEVELS, reason codes into RISK_REASONS). thresholds: per-site arrays
+    from thresholds_for_sites (or scalars); None -> the global thresholds, in
+    which case the result matches classify_risk exactly.
+    """
+    import numpy as np
+
+    snow = np.asarray(snow_in, dtype=float)
+    ice = np.asarray(ice_in, dtype=float)
+    alerts = np.asarray(has_alerts, dtype=bool)
+    t = thresholds or global_thresholds()
+
+    critical = (snow >= t["SNOW_CRITICAL_IN"]) | (ice >= t["ICE_CRITICAL_IN"])
+    warning = (snow >= t["SNOW_WARNING_IN"]) | (ice >= t["ICE_WARNING_IN"])
+    headsup = (snow >= t["SNOW_HEADSUP_IN"]) | (ice >= t["ICE_HEADSUP_IN"])
+
+    # Same precedence as classify_risk: alerts, then critical > warning > heads-up
+    reason = np.select([alerts, critical, warning, headsup], [REASON_ALERTS, 3, 2, 1], default=0).astype(np.int8)
+    level = np.where(reason == REASON_ALERTS, 2, reason).astype(np.int8)
+    return level, reason
+
+
+def classify_risk_fleet(snow_in: List[float], ice_in: List[float], has_alerts: List[bool], sites: List["Site"]) -> List[Tuple[str, str]]:
+    """(risk_level, risk_reason) per site, batch-classified with any configured overrides."""
+    level, reason = classify_risk_batch(snow_in, ice_in, has_alerts, thresholds_for_sites(sites))
+    return [(RISK_LEVELS[lv], RISK_REASONS[rc]) for lv, rc in zip(level.tolist(), reason.tolist())]
+
+
+# =========================
+# US: NWS ALERTS
+# =========================
+
+NWS_HEADERS = {"User-Agent": NWS_USER_AGENT, "Accept": "application/geo+json"}
+
+
+def nws_alerts_url(lat: float, lon: float) -> str:
+    return f"{NWS_API_BASE}/alerts/active?point={lat:.6f},{lon:.6f}"
+
+
+def fetch_nws_alerts(lat: float, lon: float) -> List[AlertItem]:
+    return parse_nws_alerts(http_get_json(nws_alerts_url(lat, lon), headers=NWS_HEADERS))
+
+
+async def fetch_nws_alerts_async(client: AsyncHttpClient, lat: float, lon: float) -> List[AlertItem]:
+    return parse_nws_alerts(await client.get_json(nws_alerts_url(lat, lon), headers=NWS_HEADERS))
+
+
+def parse_nws_alert_feature(feat: dict) -> AlertItem:
+    props = feat.get("properties") or {}
+    title = props.get("headline") or props.get("event") or "Alert"
+    starts = props.get("effective") or props.get("onset")
+    ends = props.get("ends") or props.get("expires")
+    severity = intern_str(props.get("severity"))
+    alert_id = props.get("id") or feat.get("id") or title
+    # point lookups return the same alert for every nearby point; intern so copies share text
+    return AlertItem(
+        title=intern_str(title), starts=intern_str(starts), ends=intern_str(ends), severity=severity, source="NWS",
+        id=intern_str(alert_id),
+    )
+
+
+def parse_nws_alerts(data: dict) -> List[AlertItem]:
+    return [parse_nws_alert_feature(feat) for feat in (data.get("features") or [])[:50]]
+
+
+# =========================
+# US: NWS ALERTS (bulk: one feed per state or nationally, matched locally)
+# =========================
+
+US_STATE_NAMES = {
+    "alabama": "AL", "alaska": "AK", "arizona": "AZ", "arkansas": "AR", "california": "CA",
+    "colorado": "CO", "connecticut": "CT", "delaware": "DE", "district of columbia": "DC",
+    "florida": "FL", "georgia": "GA", "hawaii": "HI", "idaho": "ID", "illinois": "IL",
+    "indiana": "IN", "iowa": "IA", "kansas": "KS", "kentucky": "KY", "louisiana": "LA",
+    "maine": "ME", "maryland": "MD", "massachusetts": "MA", "michigan": "MI", "minnesota": "MN",
+    "mississippi": "MS", "missouri": "MO", "montana": "MT", "nebraska": "NE", "nevada": "NV",
+    "new hampshire": "NH", "new jersey": "NJ", "new mexico": "NM", "new york": "NY",
+    "north carolina": "NC", "north dakota": "ND", "ohio": "OH", "oklahoma": "OK", "oregon": "OR",
+    "pennsylvania": "PA", "rhode island": "RI", "south carolina": "SC", "south dakota": "SD",
+    "tennessee": "TN", "texas": "TX", "utah": "UT", "vermont": "VT", "virginia": "VA",
+    "washington": "WA", "west virginia": "WV", "wisconsin": "WI", "wyoming": "WY",
+    "puerto rico": "PR", "guam": "GU", "american samoa": "AS", "virgin islands": "VI",
+    "northern mariana islands": "MP",
+}
+US_STATE_CODES = set(US_STATE_NAMES.values())
+
+_ZIP_TAIL_RE = re.compile(r"^(.*?)[\s,]+\d{5}(?:-\d{4})?\s*$")
+
+
+def infer_us_state(address: str) -> str:
+    """
+    Two-letter state code from a US address ending in a ZIP code
+    ("... Wilmer, TX 75172", "... Morris, Illinois 60450"); "" if unknown.
+    """
+    m = _ZIP_TAIL_RE.match(address.strip())
+    if not m:
+        return ""
+    words = re.split(r"[\s,.]+", m.group(1).strip().lower())
+    if words and words[-1].upper() in US_STATE_CODES:
+        return words[-1].upper()
+    for n in (3, 2, 1):
+        name = " ".join(words[-n:])
+        if len(words) >= n and name in US_STATE_NAMES:
+            return US_STATE_NAMES[name]
+    return ""
+
+
+def nws_area_alerts_url(area: str) -> str:
+    """area: two-letter state code, or "" for the national feed."""
+    if not area:
+        return f"{NWS_API_BASE}/alerts/active"
+    return f"{NWS_API_BASE}/alerts/active?area={area}"
+
+
+def nws_points_url(lat: float, lon: float) -> str:
+    # /points only accepts up to 4 decimals
+    return f"{NWS_API_BASE}/points/{lat:.4f},{lon:.4f}"
+
+
+def _url_tail(url: str) -> str:
+    return url.rstrip("/").rsplit("/", 1)[-1]
+
+
+def parse_nws_point_zones(data: dict) -> List[str]:
+    """UGC codes (forecast zone, county, fire zone) covering a /points location."""
+    props = data.get("properties") or {}
+    keys = ("forecastZone", "county", "fireWeatherZone")
+    return [_url_tail(props[k]) for k in keys if props.get(k)]
+
+
+def fetch_nws_point_zones(lat: float, lon: float) -> List[str]:
+    return parse_nws_point_zones(http_get_json(nws_points_url(lat, lon), headers=NWS_HEADERS))
+
+
+async def fetch_nws_point_zones_async(client: AsyncHttpClient, lat: float, lon: float) -> List[str]:
+    return parse_nws_point_zones(await client.get_json(nws_points_url(lat, lon), headers=NWS_HEADERS))
+
+
+class PointZoneMap:
+    """
+    Point -> UGC zones from /points. A location's zones don't change, so the map is
+    kept on disk (NWS_ZONES_FILE) and in memory across --daemon runs; /points is
+    only called for sites not seen before.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.zones: Dict[str, List[str]] = {}
+        self.loaded = False
+        self.dirty = False
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(lat: float, lon: float) -> str:
+        return f"{lat:.4f},{lon:.4f}"  # same precision as nws_points_url
+
+    def load(self) -> None:
+        with self.lock:
+            if self.loaded:
+                return
+            self.loaded = True
+            if not self.path:
+                return
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    self.zones.update({k: v for k, v in data.items() if isinstance(v, list)})
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                print(f"Ignoring unreadable zones file {self.path}: {e}")
+
+    def get(self, lat: float, lon: float) -> Optional[List[str]]:
+        self.load()
+        return self.zones.get(self.key(lat, lon))
+
+    def put(self, lat: float, lon: float, zones: List[str]) -> None:
+        with self.lock:
+            self.zones[self.key(lat, lon)] = zones
+            self.dirty = True
+
+    def save(self) -> None:
+        with self.lock:
+            if not self.path or not self.dirty:
+                return
+            try:
+                tmp = f"{self.path}.tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(self.zones, f, separators=(",", ":"), sort_keys=True)
+                os.replace(tmp, self.path)
+                self.dirty = False
+            except OSError as e:
+                print(f"Could not write zones file {self.path}: {e}")
+
+
+POINT_ZONES = PointZoneMap(NWS_ZONES_FILE)
+
+
+# GeoJSON polygon as rings of (lon, lat); ring 0 is the outer boundary, the rest are holes
+Polygon = List[List[Tuple[float, float]]]
+
+
+def geojson_polygons(geometry: Optional[dict]) -> List[Polygon]:
+    if not geometry:
+        return []
+    gtype = geometry.get("type")
+    coords = geometry.get("coordinates") or []
+    if gtype == "Polygon":
+        polys = [coords]
+    elif gtype == "MultiPolygon":
+        polys = coords
+    elif gtype == "GeometryCollection":
+        return [p for g in geometry.get("geometries") or [] for p in geojson_polygons(g)]
+    else:
+        return []
+    return [[[(float(x), float(y)) for x, y, *_ in ring] for ring in poly if ring] for poly in polys if poly]
+
+
+def point_in_ring(lon: float, lat: float, ring: List[Tuple[float, float]]) -> bool:
+    inside = False
+    j = len(ring) - 1
+    for i in range(len(ring)):
+        xi, yi = ring[i]
+        xj, yj = ring[j]
+        if (yi > lat) != (yj > lat) and lon < (xj - xi) * (lat - yi) / (yj - yi) + xi:
+            inside = not inside
+        j = i
+    return inside
+
+
+def point_in_polygon(lon: float, lat: float, poly: Polygon) -> bool:
+    if not poly or not point_in_ring(lon, lat, poly[0]):
+        return False
+    return not any(point_in_ring(lon, lat, hole) for hole in poly[1:])
+
+
+class PolygonGridIndex:
+    """
+    Uniform lat/lon grid over polygon bounding boxes. A point lookup returns only
+    the polygons whose bbox covers the point, so exact point-in-polygon runs on a
+    handful of candidates instead of every vertex of every alert.
+    """
+
+    def __init__(self, cell_deg: float):
+        self.cell_deg = cell_deg if cell_deg > 0 else 1.0
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+        self.items: List[Tuple[int, Polygon, Tuple[float, float, float, float]]] = []
+
+    def _cell(self, lon: float, lat: float) -> Tuple[int, int]:
+        return (int(lon // self.cell_deg), int(lat // self.cell_deg))
+
+    def insert(self, key: int, poly: Polygon) -> None:
+        xs = [x for x, _ in poly[0]]
+        ys = [y for _, y in poly[0]]
+        if not xs:
+            return
+        bbox = (min(xs), min(ys), max(xs), max(ys))
+        n = len(self.items)
+        self.items.append((key, poly, bbox))
+        x0, y0 = self._cell(bbox[0], bbox[1])
+        x1, y1 = self._cell(bbox[2], bbox[3])
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                self.cells.setdefault((cx, cy), []).append(n)
+
+    def query(self, lon: float, lat: float) -> List[int]:
+        """Keys of polygons containing (lon, lat)."""
+        hits: List[int] = []
+        for n in self.cells.get(self._cell(lon, lat), []):
+            key, poly, (minx, miny, maxx, maxy) = self.items[n]
+            if minx <= lon <= maxx and miny <= lat <= maxy and point_in_polygon(lon, lat, poly):
+                hits.append(key)
+        return hits
+
+
+@dataclass
+class NwsAlertFeed:
+    """
+    An area/national active-alert feed parsed for local matching.
+    Alerts with a geometry match by point-in-polygon (through a grid index over
+    polygon bboxes); the rest (zone-based products) match on the UGC
+    zone/county codes covering the site.
+    """
+    alerts: List[AlertItem]
+    polygons: List[List[Polygon]]
+    ugc: List[List[str]]
+    index: PolygonGridIndex = field(init=False, repr=False)
+    zone_alerts: Dict[str, List[int]] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.index = PolygonGridIndex(ALERT_INDEX_CELL_DEG)
+        self.zone_alerts = {}
+        for i, (polys, codes) in enumerate(zip(self.polygons, self.ugc)):
+            if polys:
+                for poly in polys:
+                    self.index.insert(i, poly)
+            else:
+                for c in codes:
+                    self.zone_alerts.setdefault(c, []).append(i)
+        self._zone_states = {c[:2] for c in self.zone_alerts}
+
+    def needs_zones(self, state: str = "") -> bool:
+        """True if a geometry-less alert could apply to a site in state ("" = any)."""
+        return bool(self._zone_states) and (not state or state in self._zone_states)
+
+    def match(self, lat: float, lon: float, zones: Optional[List[str]] = None) -> List[AlertItem]:
+        hits = set(self.index.query(lon, lat))
+        for z in zones or []:
+            hits.update(self.zone_alerts.get(z, []))
+        # Feed order, capped like the per-point query
+        return [self.alerts[i] for i in sorted(hits)[:50]]
+
+
+def parse_nws_alert_feed(data: dict) -> NwsAlertFeed:
+    alerts: List[AlertItem] = []
+    polygons: List[List[Polygon]] = []
+    ugc: List[List[str]] = []
+    for feat in data.get("features") or []:
+        props = feat.get("properties") or {}
+        codes = list((props.get("geocode") or {}).get("UGC") or [])
+        codes += [_url_tail(z) for z in props.get("affectedZones") or []]
+        alerts.append(parse_nws_alert_feature(feat))
+        polygons.append(geojson_polygons(feat.get("geometry")))
+        ugc.append(list(dict.fromkeys(codes)))
+    return NwsAlertFeed(alerts=alerts, polygons=polygons, ugc=ugc)
+
+
+def fetch_nws_alert_feed(area: str) -> NwsAlertFeed:
+    return parse_nws_alert_feed(http_get_json(nws_area_alerts_url(area), headers=NWS_HEADERS))
+
+
+async def fetch_nws_alert_feed_async(client: AsyncHttpClient, area: str) -> NwsAlertFeed:
+    return parse_nws_alert_feed(await client.get_json(nws_area_alerts_url(area), headers=NWS_HEADERS))
+
+
+def zone_lookups_needed(plan: "FetchPlan", areas: Dict[int, str], feeds: Dict[str, Any]) -> List[int]:
+    """Feed-matched plan points that need their UGC zones and aren't in POINT_ZONES yet."""
+    need = []
+    for p, area in areas.items():
+        feed = feeds[area]
+        if not isinstance(feed, Exception) and feed.needs_zones(plan.nws_states.get(p, "")):
+            if POINT_ZONES.get(*plan.points[p]) is None:
+                need.append(p)
+    return need
+
+
+def match_nws_feed_point(plan: "FetchPlan", p: int, feed: Any, zone_errors: Dict[int, Exception]) -> Any:
+    """Alerts for plan point p from its (already fetched) feed, or the exception to report."""
+    if isinstance(feed, Exception):
+        return feed
+    lat, lon = plan.points[p]
+    zones = None
+    if feed.needs_zones(plan.nws_states.get(p, "")):
+        zones = POINT_ZONES.get(lat, lon)
+        if zones is None:
+            return zone_errors.get(p) or RuntimeError(f"No NWS zones for {lat:.4f},{lon:.4f}")
+    return _capture(feed.match, lat, lon, zones)
+
+
+def nws_feed_areas(plan: "FetchPlan") -> Dict[int, str]:
+    """
+    Plan point -> feed to match it against under NWS_ALERT_MODE:
+    state code ("area"), "" for the national feed ("national"). Points
+    left out (point mode, or unknown state) use the per-point query.
+    """
+    if NWS_ALERT_MODE == "national":
+        return {p: "" for p in plan.nws_points}
+    if NWS_ALERT_MODE == "area":
+        return {p: plan.nws_states[p] for p in plan.nws_points if plan.nws_states.get(p)}
+    return {}
+
+
+# =========================
+# OPEN-METEO (single call per site, or batched per OPEN_METEO_BATCH_SIZE sites)
+# =========================
+
+OPEN_METEO_HEADERS = {"Accept": "application/json"}
+
+
+def open_meteo_url(lat: float, lon: float) -> str:
+    return open_meteo_batch_url([(lat, lon)])
+
+
+def open_meteo_batch_url(coords: List[Tuple[float, float]]) -> str:
+    lats = ",".join(f"{lat:.6f}" for lat, _ in coords)
+    lons = ",".join(f"{lon:.6f}" for _, lon in coords)
+    return (
+        f"{OPEN_METEO_API_BASE}/v1/forecast"
+        f"?latitude={lats}&longitude={lons}"
+        "&daily=snowfall_sum,precipitation_sum,temperature_2m_min"
+        "&forecast_days=7"
+        "&timezone=UTC"
+    )
+
+
+def fetch_open_meteo_daily(lat: float, lon: float) -> Dict[str, List[float]]:
+    """
+    Returns dict of lists length up to 7:
+      - snowfall_sum (cm)
+      - precipitation_sum (mm)
+      - temperature_2m_min (C)
+    """
+    return parse_open_meteo_daily(http_get_json(open_meteo_url(lat, lon), headers=OPEN_METEO_HEADERS))
+
+
+async def fetch_open_meteo_daily_async(client: AsyncHttpClient, lat: float, lon: float) -> Dict[str, List[float]]:
+    return parse_open_meteo_daily(await client.get_json(open_meteo_url(lat, lon), headers=OPEN_METEO_HEADERS))
+
+
+def fetch_open_meteo_daily_batch(coords: List[Tuple[float, float]]) -> List[Dict[str, List[float]]]:
+    """
+    One request for many locations. Open-Meteo answers a multi-location
+    query with a JSON array (same order as the inputs), a single one with an object.
+    """
+    data = http_get_json(open_meteo_batch_url(coords), headers=OPEN_METEO_HEADERS)
+    return split_open_meteo_batch(data, len(coords))
+
+
+async def fetch_open_meteo_daily_batch_async(
+    client: AsyncHttpClient, coords: List[Tuple[float, float]]
+) -> List[Dict[str, List[float]]]:
+    data = await client.get_json(open_meteo_batch_url(coords), headers=OPEN_METEO_HEADERS)
+    return split_open_meteo_batch(data, len(coords))
+
+
+class OpenMeteoBatchShapeError(RuntimeError):
+    """A batch answer that can't be lined up with its locations (wrong type or length)."""
+
+
+def split_open_meteo_batch(data: Any, expected: int) -> List[Dict[str, List[float]]]:
+    items = data if isinstance(data, list) else [data]
+    if len(items) != expected:
+        raise OpenMeteoBatchShapeError(f"Open-Meteo batch returned {len(items)} locations, expected {expected}")
+    if not all(isinstance(d, dict) for d in items):
+        raise OpenMeteoBatchShapeError("Open-Meteo batch returned a non-object location entry")
+    return [parse_open_meteo_daily(d) for d in items]
+
+
+def valid_coord(lat: float, lon: float) -> bool:
+    return -90.0 <= lat <= 90.0 and -180.0 <= lon <= 180.0  # also False for NaN
+
+
+def parse_open_meteo_daily(data: dict) -> Dict[str, List[float]]:
+    daily = data.get("daily") or {}
+    return {
+        "snowfall_sum": daily.get("snowfall_sum") or [0.0] * 7,
+        "precipitation_sum": daily.get("precipitation_sum") or [0.0] * 7,
+        "temperature_2m_min": daily.get("temperature_2m_min") or [999.0] * 7,
+    }
+
+
+def snow_cm_to_inches(cm: float) -> float:
+    return max(0.0, float(cm) / 2.54)
+
+def mm_to_inches(mm: float) -> float:
+    return max(0.0, float(mm) / 25.4)
+
+
+def estimate_ice_inches_proxy(precip_mm: float, snow_cm: float, tmin_c: float) -> float:
+    """
+    Ice proxy:
+    - Only when cold enough (<=0C)
+    - Only when we’re not already calling it snow-heavy (snow_cm small)
+    - Convert precip_mm to inches and multiply by ICE_PROXY_FACTOR
+    - Cap to ICE_PROXY_MAX_IN_PER_DAY
+    """
+    if tmin_c > 0.0:
+        return 0.0
+    if precip_mm <= 0.0:
+        return 0.0
+
+    # If snow is significant, assume that precip is mostly snow (not glaze ice)
+    snow_in = snow_cm_to_inches(snow_cm)
+    if snow_in >= 1.0:
+        return 0.0
+
+    ice_in = mm_to_inches(precip_mm) * ICE_PROXY_FACTOR
+    return min(max(0.0, ice_in), ICE_PROXY_MAX_IN_PER_DAY)
+
+
+def snow_ice_from_daily(daily: Dict[str, List[float]]) -> Tuple[List[float], List[float]]:
+    snow_cm = daily["snowfall_sum"][:7]
+    precip_mm = daily["precipitation_sum"][:7]
+    tmin_c = daily["temperature_2m_min"][:7]
+
+    daily_snow_in: List[float] = []
+    daily_ice_in: List[float] = []
+
+    for i in range(7):
+        sc = float(snow_cm[i]) if i < len(snow_cm) else 0.0
+        pm = float(precip_mm[i]) if i < len(precip_mm) else 0.0
+        tc = float(tmin_c[i]) if i < len(tmin_c) else 999.0
+
+        daily_snow_in.append(snow_cm_to_inches(sc))
+        daily_ice_in.append(estimate_ice_inches_proxy(pm, sc, tc))
+
+    while len(daily_snow_in) < 7:
+        daily_snow_in.append(0.0)
+    while len(daily_ice_in) < 7:
+        daily_ice_in.append(0.0)
+
+    return daily_snow_in[:7], daily_ice_in[:7]
+
+
+# =========================
+# BATCH COMPUTE (vectorized snow/ice across the fleet)
+# =========================
+
+DAILY_DEFAULTS = (("snowfall_sum", 0.0), ("precipitation_sum", 0.0), ("temperature_2m_min", 999.0))
+
+
+def compute_snow_ice_batch(snow_cm: Any, precip_mm: Any, tmin_c: Any) -> Tuple[Any, Any, Any, Any]:
+    """
+    Vectorized snow_cm_to_inches / estimate_ice_inches_proxy over (rows x days) arrays
+    (sites, or sites x ensemble members flattened). Returns daily_snow_in, daily_ice_in,
+    snow_7d_in, ice_7d_in as NumPy arrays; same rules and clips as the scalar path.
+    """
+    import numpy as np
+
+    snow_cm = np.asarray(snow_cm, dtype=float)
+    precip_mm = np.asarray(precip_mm, dtype=float)
+    tmin_c = np.asarray(tmin_c, dtype=float)
+
+    snow_in = np.maximum(0.0, snow_cm / 2.54)
+    ice_in = np.maximum(0.0, precip_mm / 25.4) * ICE_PROXY_FACTOR
+    ice_in = np.minimum(np.maximum(0.0, ice_in), ICE_PROXY_MAX_IN_PER_DAY)
+    # No glaze unless subfreezing, wet, and not already snow-heavy
+    ice_in = np.where((tmin_c > 0.0) | (precip_mm <= 0.0) | (snow_in >= 1.0), 0.0, ice_in)
+
+    # Left-to-right day sums, matching compute_totals() bit for bit
+    snow_7d = np.zeros(snow_in.shape[0])
+    ice_7d = np.zeros(ice_in.shape[0])
+    for d in range(snow_in.shape[1]):
+        snow_7d = snow_7d + snow_in[:, d]
+        ice_7d = ice_7d + ice_in[:, d]
+    return snow_in, ice_in, snow_7d, ice_7d
+
+
+def _daily_row(daily: Dict[str, List[float]], key: str, default: float) -> List[Any]:
+    vals = list(daily[key][:7])
+    return vals + [default] * (7 - len(vals))
+
+
+def compute_snow_ice_fleet(dailies: List[Any]) -> List[Any]:
+    """
+    Post-fetch compute for every forecast point in one pass.
+    dailies: fetch_open_meteo_daily() dicts, or the exception from fetching one.
+    Returns (daily_snow_in, daily_ice_in, snow_7d_in, ice_7d_in) per point, or the exception.
+    Rows the array path can't represent (nulls, odd types) go through
+    snow_ice_from_daily so they fail exactly as they would on their own.
+    """
+    import numpy as np
+
+    out: List[Any] = list(dailies)
+    rows = [i for i, d in enumerate(dailies) if not isinstance(d, Exception)]
+    try:
+        block = {
+            key: np.array([_daily_row(dailies[i], key, default) for i in rows], dtype=float).reshape(len(rows), 7)
+            for key, default in DAILY_DEFAULTS
+        }
+        ok = ~(np.isnan(block["snowfall_sum"]) | np.isnan(block["precipitation_sum"]) | np.isnan(block["temperature_2m_min"])).any(axis=1)
+        snow, ice, snow_7d, ice_7d = compute_snow_ice_batch(
+            block["snowfall_sum"], block["precipitation_sum"], block["temperature_2m_min"]
+        )
+        snow_l, ice_l, snow_t, ice_t, ok_l = snow.tolist(), ice.tolist(), snow_7d.tolist(), ice_7d.tolist(), ok.tolist()
+    except (TypeError, ValueError):
+        # a value that isn't numeric at all: per-point scalar path
+        ok_l = [False] * len(rows)
+
+    for n, i in enumerate(rows):
+        if ok_l[n]:
+            out[i] = (snow_l[n], ice_l[n], snow_t[n], ice_t[n])
+            continue
+        try:
+            daily_snow_in, daily_ice_in = snow_ice_from_daily(dailies[i])
+            out[i] = (daily_snow_in, daily_ice_in, compute_totals(daily_snow_in), compute_totals(daily_ice_in))
+        except Exception as e:
+            out[i] = e
+    return out
+
+
+# =========================
+# CANADA (optional): ECCC ATOM feed headlines
+# =========================
+
+ECCC_HEADERS = {"Accept": "application/atom+xml,application/xml,text/xml"}
+
+
+def fetch_eccc_atom_alert_titles(feed_url: str) -> List[AlertItem]:
+    if not feed_url:
+        return []
+    return parse_eccc_atom_alert_titles(http_get_text(feed_url, headers=ECCC_HEADERS))
+
+
+async def fetch_eccc_atom_alert_titles_async(client: AsyncHttpClient, feed_url: str) -> List[AlertItem]:
+    if not feed_url:
+        return []
+    return parse_eccc_atom_alert_titles(await client.get_text(feed_url, headers=ECCC_HEADERS))
+
+
+def parse_eccc_atom_alert_titles(xml_text: str) -> List[AlertItem]:
+    import xml.etree.ElementTree as ET
+
+    root = ET.fromstring(xml_text)
+
+    ns = {"atom": "http://www.w3.org/2005/Atom"}
+    alerts: List[AlertItem] = []
+
+    for entry in root.findall("atom:entry", ns):
+        title_el = entry.find("atom:title", ns)
+        if title_el is None:
+            continue
+        title = (title_el.text or "").strip()
+        if not title:
+            continue
+
+        tl = title.lower()
+        if any(k in tl for k in ["warning", "watch", "advisory", "statement", "special weather", "blizzard", "winter storm", "ice storm"]):
+            id_el = entry.find("atom:id", ns)
+            entry_id = (id_el.text or "").strip() if id_el is not None else ""
+            alerts.append(AlertItem(title=title, source="ECCC(ATOM)", id=entry_id or title))
+
+    seen = set()
+    uniq: List[AlertItem] = []
+    for a in alerts:
+        if a.title in seen:
+            continue
+        seen.add(a.title)
+        uniq.append(a)
+    return uniq
+
+
+# =========================
+# RESULT TABLE (columnar results for large fleets)
+# =========================
+
+class Categorical:
+    """Interned string column: int32 codes into the distinct values (first-seen order)."""
+
+    __slots__ = ("codes", "categories")
+
+    def __init__(self, values: List[Optional[str]]):
+        import numpy as np
+
+        index: Dict[Optional[str], int] = {}
+        codes = [index.setdefault(v, len(index)) for v in values]
+        self.categories: List[Optional[str]] = [sys.intern(v) if isinstance(v, str) else v for v in index]
+        self.codes = np.asarray(codes, dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, i: int) -> Optional[str]:
+        return self.categories[self.codes[i]]
+
+    def tolist(self) -> List[Optional[str]]:
+        cats = self.categories
+        return [cats[c] for c in self.codes.tolist()]
+
+    def eq(self, value: str) -> Any:
+        """Boolean mask of rows equal to value."""
+        import numpy as np
+
+        if value not in self.categories:
+            return np.zeros(len(self.codes), dtype=bool)
+        return self.codes == self.categories.index(value)
+
+    def ranks(self, key: Any = None) -> Any:
+        """Per-row sort key: the rank of each row's value under key (default: the value itself)."""
+        import numpy as np
+
+        order = sorted(range(len(self.categories)), key=lambda c: (key or (lambda v: v))(self.categories[c]))
+        rank = np.empty(len(self.categories), dtype=np.int32)
+        rank[order] = np.arange(len(order), dtype=np.int32)
+        return rank[self.codes] if len(self.categories) else self.codes
+
+
+class ResultTable:
+    """
+    Columnar results for a run (what the pipeline returns instead of List[SiteResult]):
+    - float64 arrays for coordinates and 7-day totals; (n x 7) arrays for the daily series
+    - interned Categorical columns for country / prime_status / risk_level / risk_reason / confidence
+    - alerts flattened into one table; site i owns alert rows alert_offsets[i]:alert_offsets[i + 1]
+    Iterating or indexing yields SiteResult rows, so list-style consumers keep working;
+    render_markdown / write_csv / notify read the columns directly.
+    """
+
+    STR_COLUMNS = ("site_code", "site_name", "address")
+    CAT_COLUMNS = ("country", "prime_status", "risk_level", "risk_reason", "confidence")
+    FLOAT_COLUMNS = ("lat", "lon", "forecast_lat", "forecast_lon", "snow_7d_in", "ice_7d_in")
+    DAILY_COLUMNS = ("daily_snow_in", "daily_ice_in")
+
+    def __init__(self, columns: Dict[str, List[Any]], alerts: List[List[AlertItem]]):
+        import numpy as np
+
+        self.n = len(columns["site_code"])
+        for name in self.STR_COLUMNS:
+            setattr(self, name, list(columns[name]))
+        for name in self.CAT_COLUMNS:
+            setattr(self, name, Categorical(columns[name]))
+        for name in self.FLOAT_COLUMNS:
+            setattr(self, name, np.asarray(columns[name], dtype=float))
+        for name in self.DAILY_COLUMNS:
+            setattr(self, name, np.asarray(columns[name], dtype=float).reshape(self.n, 7))
+
+        self.alert_offsets = np.zeros(self.n + 1, dtype=np.int64)
+        np.cumsum([len(a) for a in alerts], out=self.alert_offsets[1:])
+        flat = [a for site_alerts_ in alerts for a in site_alerts_]
+        self.alert_title = [a.title for a in flat]
+        self.alert_id = [a.id for a in flat]
+        self.alert_starts = [a.starts for a in flat]
+        self.alert_ends = [a.ends for a in flat]
+        self.alert_severity = Categorical([a.severity for a in flat])
+        self.alert_source = Categorical([a.source for a in flat])
+
+    # ---- construction ----
+
+    @classmethod
+    def from_results(cls, results: List[SiteResult]) -> "ResultTable":
+        cols: Dict[str, List[Any]] = {
+            name: [getattr(r, name) for r in results]
+            for name in cls.STR_COLUMNS + cls.CAT_COLUMNS + cls.FLOAT_COLUMNS + cls.DAILY_COLUMNS
+        }
+        cols["forecast_lat"] = [r.lat if r.forecast_lat is None else r.forecast_lat for r in results]
+        cols["forecast_lon"] = [r.lon if r.forecast_lon is None else r.forecast_lon for r in results]
+        return cls(cols, [r.alerts for r in results])
+
+    @classmethod
+    def from_outcomes(
+        cls,
+        sites: List[Site],
+        outcomes: List["SiteOutcome"],
+        risks: List[Tuple[str, str]],
+        forecast_points: List[Tuple[float, float]],
+    ) -> "ResultTable":
+        """Build straight from the pipeline stages, without per-site SiteResult objects."""
+        cols: Dict[str, List[Any]] = {
+            "site_code": [s.site_code for s in sites],
+            "site_name": [s.site_name for s in sites],
+            "address": [s.address for s in sites],
+            "country": [s.country for s in sites],
+            "prime_status": [s.prime_status for s in sites],
+            "risk_level": [r[0] for r in risks],
+            "risk_reason": [r[1] for r in risks],
+            "confidence": [o.confidence for o in outcomes],
+            "lat": [s.lat for s in sites],
+            "lon": [s.lon for s in sites],
+            "forecast_lat": [p[0] for p in forecast_points],
+            "forecast_lon": [p[1] for p in forecast_points],
+            "snow_7d_in": [o.snow_7d_in for o in outcomes],
+            "ice_7d_in": [o.ice_7d_in for o in outcomes],
+            "daily_snow_in": [o.daily_snow_in for o in outcomes],
+            "daily_ice_in": [o.daily_ice_in for o in outcomes],
+        }
+        return cls(cols, [o.alerts for o in outcomes])
+
+    # ---- row access ----
+
+    def __len__(self) -> int:
+        return self.n
+
+    def alerts_for(self, i: int, limit: Optional[int] = None) -> List[AlertItem]:
+        lo, hi = int(self.alert_offsets[i]), int(self.alert_offsets[i + 1])
+        if limit is not None:
+            hi = min(hi, lo + limit)
+        return [
+            AlertItem(
+                title=self.alert_title[k],
+                starts=self.alert_starts[k],
+                ends=self.alert_ends[k],
+                severity=self.alert_severity[k],
+                source=self.alert_source[k] or "",
+                id=self.alert_id[k],
+            )
+            for k in range(lo, hi)
+        ]
+
+    def alert_titles(self, i: int, limit: Optional[int] = None) -> List[str]:
+        lo, hi = int(self.alert_offsets[i]), int(self.alert_offsets[i + 1])
+        return self.alert_title[lo:hi if limit is None else min(hi, lo + limit)]
+
+    def alert_ids(self, i: int) -> List[str]:
+        return self.alert_id[int(self.alert_offsets[i]):int(self.alert_offsets[i + 1])]
+
+    def alerts_count(self) -> Any:
+        import numpy as np
+
+        return np.diff(self.alert_offsets)
+
+    def row(self, i: int) -> SiteResult:
+        return SiteResult(
+            site_code=self.site_code[i],
+            site_name=self.site_name[i],
+            country=self.country[i],
+            prime_status=self.prime_status[i],
+            lat=float(self.lat[i]),
+            lon=float(self.lon[i]),
+            alerts=self.alerts_for(i),
+            snow_7d_in=float(self.snow_7d_in[i]),
+            ice_7d_in=float(self.ice_7d_in[i]),
+            daily_snow_in=self.daily_snow_in[i].tolist(),
+            daily_ice_in=self.daily_ice_in[i].tolist(),
+            risk_level=self.risk_level[i],
+            risk_reason=self.risk_reason[i],
+            confidence=self.confidence[i],
+            address=self.address[i],
+            forecast_lat=float(self.forecast_lat[i]),
+            forecast_lon=float(self.forecast_lon[i]),
+        )
+
+    def __getitem__(self, i: int) -> SiteResult:
+        if i < 0:
+            i += self.n
+        if not 0 <= i < self.n:
+            raise IndexError(i)
+        return self.row(i)
+
+    def __iter__(self) -> Iterator[SiteResult]:
+        return (self.row(i) for i in range(self.n))
+
+    def to_results(self) -> List[SiteResult]:
+        return list(self)
+
+    # ---- array ops ----
+
+    def risk_mask(self, level: str) -> Any:
+        return self.risk_level.eq(level)
+
+    def code_ranks(self) -> Any:
+        """Per-row rank of site_code (string order), usable as a sort key in order()."""
+        import numpy as np
+
+        rank = np.empty(self.n, dtype=np.int64)
+        rank[sorted(range(self.n), key=self.site_code.__getitem__)] = np.arange(self.n)
+        return rank
+
+    def order(self, mask: Any = None, *keys: Any) -> List[int]:
+        """
+        Row indices where mask is true (all rows if None), stably sorted by keys
+        (primary first) -- same ordering as sorted() with a tuple key.
+        """
+        import numpy as np
+
+        idx = np.arange(self.n) if mask is None else np.flatnonzero(mask)
+        if keys and len(idx):
+            idx = idx[np.lexsort([np.asarray(k)[idx] for k in reversed(keys)])]
+        return idx.tolist()
+
+
+def as_result_table(results: Any) -> ResultTable:
+    return results if isinstance(results, ResultTable) else ResultTable.from_results(list(results))
+
+
+# =========================
+# REPORTING
+# =========================
+
+def fmt_in(x: float) -> str:
+    return f"{x:.2f}"
+
+def compute_totals(daily: List[float]) -> float:
+    return float(sum(daily))
+
+def render_markdown(results: Union[ResultTable, List[SiteResult]]) -> str:
+    t = as_result_table(results)
+    now = dt.datetime.utcnow().strftime("%Y-%m-%d %H:%M UTC")
+    snow = t.snow_7d_in.tolist()
+    ice = t.ice_7d_in.tolist()
+    neg_total = -(t.snow_7d_in + t.ice_7d_in)
+    code_rank = t.code_ranks()
+    has_alerts = (t.alerts_count() > 0).tolist()
+    risk = t.risk_level.tolist()
+    flagged = t.order(~t.risk_mask("NONE"))
+    critical = t.order(t.risk_mask("CRITICAL"), neg_total, code_rank)
+    warning = t.order(t.risk_mask("WARNING"), neg_total, code_rank)
+    heads = t.order(t.risk_mask("HEADSUP"), neg_total, code_rank)
+
+    def summary_line(i: int) -> str:
+        a = "YES" if has_alerts[i] else "NO"
+        return f"- **{t.site_code[i]} — {t.site_name[i]}** ({t.country[i]}) | Alerts: {a} | Snow: {fmt_in(snow[i])} in | Ice: {fmt_in(ice[i])} in | **{risk[i]}**"
+
+    md: List[str] = []
+    md.append("# Severe Weather Monitor — 7-Day Rolling Outlook\n")
+    md.append(f"**Run time:** {now}  ")
+    md.append(f"**Timezone label:** {LOCAL_TZ_LABEL}\n")
+    md.append(f"**Ice method:** Proxy estimate (subfreezing min temp + precipitation). ICE_PROXY_FACTOR={ICE_PROXY_FACTOR}\n")
+
+    md.append("## Executive Summary\n")
+    if not flagged:
+        md.append("No sites flagged (no active alerts and forecast accumulation below thresholds).\n")
+    else:
+        if critical:
+            md.append("### Critical (act now)\n")
+            for i in critical:
+                md.append(summary_line(i))
+            md.append("")
+        if warning:
+            md.append("### Warning\n")
+            for i in warning:
+                md.append(summary_line(i))
+            md.append("")
+        if heads:
+            md.append("### Heads-up\n")
+            for i in heads:
+                md.append(summary_line(i))
+            md.append("")
+
+    md.append("## Site Table (All)\n")
+    md.append("| Site Code | Site | Country | Alerts | Snow (7d, in) | Ice (7d, in) | Risk | Confidence |")
+    md.append("|---|---|---:|---:|---:|---:|---:|---:|")
+    for i in t.order(None, code_rank):
+        md.append(
+            f"| {t.site_code[i]} | {t.site_name[i]} | {t.country[i]} | "
+            f"{'YES' if has_alerts[i] else 'NO'} | {fmt_in(snow[i])} | {fmt_in(ice[i])} | "
+            f"{risk[i]} | {t.confidence[i]} |"
+        )
+
+    if flagged:
+        md.append("\n## Details (Flagged Sites)\n")
+        for i in t.order(~t.risk_mask("NONE"), t.risk_level.ranks(), neg_total):
+            md.append(f"### {t.site_code[i]} — {t.site_name[i]} ({t.country[i]})")
+            md.append(f"- **Risk:** {risk[i]} — {t.risk_reason[i]}")
+            md.append(f"- **7-day totals:** Snow {fmt_in(snow[i])} in | Ice {fmt_in(ice[i])} in")
+            md.append(f"- **Confidence:** {t.confidence[i]}")
+            if t.address[i]:
+                md.append(f"- **Address:** {t.address[i]}")
+
+            if has_alerts[i]:
+                md.append("\n**Active Alerts:**")
+                for a in t.alerts_for(i, limit=10):
+                    parts = [a.title]
+                    if a.starts:
+                        parts.append(f"start: {a.starts}")
+                    if a.ends:
+                        parts.append(f"end: {a.ends}")
+                    if a.severity:
+                        parts.append(f"severity: {a.severity}")
+                    parts.append(f"source: {a.source}")
+                    md.append("- " + " | ".join(parts))
+
+            md.append("\n**Daily accumulation (next 7 days, UTC buckets):**")
+            md.append("- Snow (in): " + ", ".join(fmt_in(x) for x in t.daily_snow_in[i].tolist()))
+            md.append("- Ice  (in): " + ", ".join(fmt_in(x) for x in t.daily_ice_in[i].tolist()))
+            md.append("")
+    return "\n".join(md).strip() + "\n"
+
+
+def write_csv(results: Union[ResultTable, List[SiteResult]], path: str) -> None:
+    t = as_result_table(results)
+    fieldnames = [
+        "site_code", "site_name", "country", "prime_status", "lat", "lon",
+        "risk_level", "risk_reason", "confidence",
+        "snow_7d_in", "ice_7d_in",
+        "alerts_count", "alerts_titles",
+        "daily_snow_in", "daily_ice_in",
+        "address",
+        "forecast_lat", "forecast_lon",
+    ]
+    # whole columns are converted once; rounding matches round(x, 3) on Python floats
+    columns = {
+        "site_code": t.site_code,
+        "site_name": t.site_name,
+        "country": t.country.tolist(),
+        "prime_status": t.prime_status.tolist(),
+        "lat": t.lat.tolist(),
+        "lon": t.lon.tolist(),
+        "risk_level": t.risk_level.tolist(),
+        "risk_reason": t.risk_reason.tolist(),
+        "confidence": t.confidence.tolist(),
+        "snow_7d_in": [round(x, 3) for x in t.snow_7d_in.tolist()],
+        "ice_7d_in": [round(x, 3) for x in t.ice_7d_in.tolist()],
+        "alerts_count": t.alerts_count().tolist(),
+        "alerts_titles": [" || ".join(t.alert_titles(i, limit=10)) for i in range(len(t))],
+        "daily_snow_in": [json.dumps([round(x, 3) for x in row]) for row in t.daily_snow_in.tolist()],
+        "daily_ice_in": [json.dumps([round(x, 3) for x in row]) for row in t.daily_ice_in.tolist()],
+        "address": t.address,
+        "forecast_lat": t.forecast_lat.tolist(),
+        "forecast_lon": t.forecast_lon.tolist(),
+    }
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(fieldnames)
+        w.writerows(zip(*(columns[name] for name in fieldnames)))
+
+
+# =========================
+# HISTORY ARCHIVE (SQLite, optional)
+# =========================
+# One row per site per run in site_results (daily series stored as JSON arrays), the
+# run's alerts in alerts, keyed by (run_id, site_idx) = the site's position in the run.
+
+ARCHIVE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    run_time TEXT NOT NULL,
+    engine TEXT NOT NULL,
+    sites INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS site_results (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id),
+    site_idx INTEGER NOT NULL,
+    run_time TEXT NOT NULL,
+    site_code TEXT NOT NULL,
+    site_name TEXT NOT NULL,
+    country TEXT NOT NULL,
+    risk_level TEXT NOT NULL,
+    risk_reason TEXT NOT NULL,
+    confidence TEXT NOT NULL,
+    snow_7d_in REAL NOT NULL,
+    ice_7d_in REAL NOT NULL,
+    daily_snow_in TEXT NOT NULL,
+    daily_ice_in TEXT NOT NULL,
+    alerts_count INTEGER NOT NULL,
+    lat REAL, lon REAL, forecast_lat REAL, forecast_lon REAL,
+    PRIMARY KEY (run_id, site_idx)
+);
+CREATE TABLE IF NOT EXISTS alerts (
+    run_id INTEGER NOT NULL,
+    site_idx INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    starts TEXT, ends TEXT, severity TEXT, source TEXT, alert_id TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_site_results_site_time ON site_results (site_code, run_time);
+CREATE INDEX IF NOT EXISTS ix_site_results_time_risk ON site_results (run_time, risk_level);
+CREATE INDEX IF NOT EXISTS ix_alerts_run_site ON alerts (run_id, site_idx);
+"""
+
+
+def archive_connect(path: str) -> "sqlite3.Connection":
+    import sqlite3
+
+    remaining = deadline_remaining()
+    conn = sqlite3.connect(path, timeout=5.0 if remaining is None else max(0.0, min(5.0, remaining)))
+    # WAL: readers (trend queries, dashboards) never block the twice-daily writer
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(ARCHIVE_SCHEMA)
+    return conn
+
+
+def archive_run(conn: "sqlite3.Connection", results: Union[ResultTable, List[SiteResult]],
+                run_time: str, engine: str = "") -> int:
+    """Record one run (sites + alerts) in a single transaction; returns its run_id."""
+    import numpy as np
+
+    t = as_result_table(results)
+    n = len(t)
+    rows = zip(
+        range(n),
+        t.site_code, t.site_name, t.country.tolist(),
+        t.risk_level.tolist(), t.risk_reason.tolist(), t.confidence.tolist(),
+        t.snow_7d_in.tolist(), t.ice_7d_in.tolist(),
+        (json.dumps(r) for r in t.daily_snow_in.tolist()),
+        (json.dumps(r) for r in t.daily_ice_in.tolist()),
+        t.alerts_count().tolist(),
+        t.lat.tolist(), t.lon.tolist(), t.forecast_lat.tolist(), t.forecast_lon.tolist(),
+    )
+    alert_site = np.repeat(np.arange(n), t.alerts_count()).tolist()
+    with conn:
+        run_id = conn.execute(
+            "INSERT INTO runs (run_time, engine, sites) VALUES (?, ?, ?)", (run_time, engine, n)
+        ).lastrowid
+        conn.executemany(
+            "INSERT INTO site_results (run_id, site_idx, run_time, site_code, site_name, country,"
+            " risk_level, risk_reason, confidence, snow_7d_in, ice_7d_in, daily_snow_in, daily_ice_in,"
+            " alerts_count, lat, lon, forecast_lat, forecast_lon)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            ((run_id, r[0], run_time) + r[1:] for r in rows),
+        )
+        conn.executemany(
+            "INSERT INTO alerts (run_id, site_idx, title, starts, ends, severity, source, alert_id)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            zip(
+                [run_id] * len(alert_site), alert_site,
+                t.alert_title, t.alert_starts, t.alert_ends,
+                t.alert_severity.tolist(), t.alert_source.tolist(), t.alert_id,
+            ),
+        )
+    return run_id
+
+
+def archive_trend(conn: "sqlite3.Connection", site_code: str, runs: int = 10) -> List[Tuple[str, float, float, str]]:
+    """(run_time, snow_7d_in, ice_7d_in, risk_level) for the site's last `runs` runs, oldest first."""
+    rows = conn.execute(
+        "SELECT run_time, snow_7d_in, ice_7d_in, risk_level FROM site_results"
+        " WHERE site_code = ? ORDER BY run_time DESC, run_id DESC LIMIT ?",
+        (site_code, runs),
+    ).fetchall()
+    return rows[::-1]
+
+
+def print_trend(path: str, site_code: str, runs: int) -> None:
+    conn = archive_connect(path)
+    try:
+        rows = archive_trend(conn, site_code, runs)
+    finally:
+        conn.close()
+    if not rows:
+        print(f"No archived runs for {site_code} in {path}")
+        return
+    print(f"{site_code}: last {len(rows)} run(s)")
+    for run_time, snow, ice, risk in rows:
+        print(f"  {run_time}  snow {fmt_in(snow)} in  ice {fmt_in(ice)} in  {risk}")
+
+
+# =========================
+# RUN STATE (previous run's risk + alerts, for delta notifications)
+# =========================
+# STATE_FILE holds {"run_time": ..., "sites": {"<site_code>|<site_name>": {"risk_level": ...,
+# "alerts": {alert_id: title}}}}. Site codes are not unique across the fleet, hence the name.
+
+class SiteChange(NamedTuple):
+    """What changed for one site (row idx of the ResultTable) since the previous run."""
+    idx: int
+    old_level: str
+    new_level: str
+    new_alerts: List[str]      # titles
+    cleared_alerts: List[str]  # titles
+
+    @property
+    def kind(self) -> str:
+        old, new = risk_rank(self.old_level), risk_rank(self.new_level)
+        return "UPGRADE" if new > old else "DOWNGRADE" if new < old else "ALERTS"
+
+
+def risk_rank(level: str) -> int:
+    return RISK_LEVELS.index(level) if level in RISK_LEVELS else 0
+
+
+def state_key(site_code: str, site_name: str) -> str:
+    return f"{site_code}|{site_name}"
+
+
+def load_run_state(path: str) -> Dict[str, Any]:
+    """Per-site state from the previous run ({} on the first run or if the file is unreadable)."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"Ignoring unreadable state file {path}: {e}")
+        return {}
+    sites = data.get("sites") if isinstance(data, dict) else None
+    return sites if isinstance(sites, dict) else {}
+
+
+def save_run_state(path: str, sites: Dict[str, Any], run_time: str) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"run_time": run_time, "sites": sites}, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def diff_run_state(prev: Dict[str, Any], results: Union[ResultTable, List[SiteResult]]) -> Tuple[List[SiteChange], Dict[str, Any]]:
+    """
+    Changes vs the previous run, plus the state to persist for the next one.
+    Degraded data is not a change: a LOW-confidence forecast keeps the previous risk
+    level (but at least WARNING while NWS/ECCC alerts are active) and a failed alert
+    fetch keeps the previous alerts.
+    """
+    t = as_result_table(results)
+    changes: List[SiteChange] = []
+    state: Dict[str, Any] = {}
+    for i in range(len(t)):
+        key = state_key(t.site_code[i], t.site_name[i])
+        old = prev.get(key) or {}
+        old_alerts: Dict[str, str] = old.get("alerts") or {}
+
+        titles, ids = t.alert_titles(i), t.alert_ids(i)
+        if any("fetch failed" in title.lower() for title in titles):
+            alerts = dict(old_alerts)
+        else:
+            alerts = {a_id: title for a_id, title in zip(ids, titles) if a_id}
+
+        level = t.risk_level[i]
+        if t.confidence[i] == "LOW":
+            # only the forecast-derived part is unknown; real alerts still mean WARNING
+            level = old.get("risk_level", level)
+            if alerts and risk_rank(level) < risk_rank("WARNING"):
+                level = "WARNING"
+        old_level = old.get("risk_level", "NONE")
+
+        new = [title for a_id, title in alerts.items() if a_id not in old_alerts]
+        cleared = [title for a_id, title in old_alerts.items() if a_id not in alerts]
+        if level != old_level or new or cleared:
+            changes.append(SiteChange(i, old_level, level, new, cleared))
+        state[key] = {"risk_level": level, "alerts": alerts}
+
+    changes.sort(key=lambda c: (-risk_rank(c.new_level), t.site_code[c.idx]))
+    return changes, state
+
+
+# =========================
+# INCREMENTAL REFRESH (re-fetch only sites that are due)
+# =========================
+# LAST_RESULTS_FILE keeps each site's last SiteResult and when it was fetched:
+# {"<site_code>|<site_name>": {"fetched_at": epoch_sec, "result": {...SiteResult fields}}}
+
+def load_last_results(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"Ignoring unreadable results store {path}: {e}")
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def save_last_results(path: str, store: Dict[str, Any]) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(store, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def stored_result(entry: Dict[str, Any]) -> SiteResult:
+    d = dict(entry["result"])
+    d["alerts"] = [AlertItem(**a) for a in d.get("alerts") or []]
+    return SiteResult(**d)
+
+
+def site_due(site: Site, entry: Optional[Dict[str, Any]], now: float) -> bool:
+    """
+    A site is due when it has no stored result, its location changed, the last
+    result was degraded (LOW confidence, or an alert fetch that failed), or the
+    result is older than the refresh interval for its risk level.
+    """
+    if not entry:
+        return True
+    try:
+        r = entry["result"]
+        if r["lat"] != site.lat or r["lon"] != site.lon or r["confidence"] == "LOW":
+            return True
+        if any("fetch failed" in a["title"].lower() for a in r.get("alerts") or []):
+            return True
+        interval_min = REFRESH_MINUTES.get(r["risk_level"], min(REFRESH_MINUTES.values()))
+        return now - float(entry["fetched_at"]) >= interval_min * 60
+    except (KeyError, TypeError, ValueError):
+        return True
+
+
+def refresh_sites(sites: List[Site], engine: str, path: str, force: Optional[set] = None) -> ResultTable:
+    """Evaluate only the due sites (and the indices in force); everything else reuses its stored result."""
+    from dataclasses import asdict
+
+    with RUN_STATS.stage("refresh"):
+        store = load_last_results(path)
+        now = time.time()
+        keys = [state_key(s.site_code, s.site_name) for s in sites]
+        force = force or set()
+        due = [i for i, (s, k) in enumerate(zip(sites, keys)) if i in force or site_due(s, store.get(k), now)]
+        due_set = set(due)
+        try:
+            rows = [None if i in due_set else stored_result(store[k]) for i, k in enumerate(keys)]
+        except Exception as e:
+            print(f"Results store {path} does not match SiteResult, refreshing all sites: {e}")
+            due, rows = list(range(len(sites))), [None] * len(sites)
+    print(f"Incremental refresh: {len(due)} of {len(sites)} site(s) due")
+
+    if due:
+        fresh = evaluate_fleet([sites[i] for i in due], engine)
+        for j, i in enumerate(due):
+            rows[i] = fresh.row(j)
+            store[keys[i]] = {"fetched_at": now, "result": asdict(rows[i])}
+
+    with RUN_STATS.stage("refresh"):
+        # sites dropped from the registry drop out of the store
+        save_last_results(path, {k: store[k] for k in keys if k in store})
+        return ResultTable.from_results(rows)
+
+
+# =========================
+# NOTIFICATIONS (optional)
+# =========================
+
+def send_teams(webhook_url: str, title: str, body: str) -> None:
+    if not webhook_url:
+        return
+    payload = {"text": f"**{title}**\n\n{body[:3500]}"}
+    RATE_LIMITER.acquire(webhook_url)
+    RUN_STATS.count_request(webhook_url)
+    r = http_session().post(webhook_url, json=payload, timeout=request_timeout())
+    r.raise_for_status()
+
+
+def send_email(subject: str, body: str) -> None:
+    if not (SMTP_HOST and EMAIL_TO and EMAIL_FROM):
+        return
+    import smtplib
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+
+    msg = MIMEMultipart()
+    msg["From"] = EMAIL_FROM
+    msg["To"] = EMAIL_TO
+    msg["Subject"] = subject
+    msg.attach(MIMEText(body, "plain", "utf-8"))
+
+    with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=request_timeout()) as server:
+        server.starttls()
+        if SMTP_USER and SMTP_PASS:
             server.login(SMTP_USER, SMTP_PASS)
         recipients = [x.strip() for x in EMAIL_TO.split(",") if x.strip()]
         server.sendmail(EMAIL_FROM, recipients, msg.as_string())
@@ -572,105 +3054,766 @@ def send_email(subject: str, body: str) -> None:
 # MAIN EVALUATION
 # =========================
 
-def evaluate_site(site: Site) -> SiteResult:
-    alerts: List[AlertItem] = []
-    is_us = site.country.strip().lower() in ["united states", "usa", "us"]
-    is_ca = site.country.strip().lower() in ["canada", "ca"]
+def is_us_site(site: Site) -> bool:
+    return site.country.strip().lower() in ["united states", "usa", "us"]
+
+def is_ca_site(site: Site) -> bool:
+    return site.country.strip().lower() in ["canada", "ca"]
+
 
-    # Alerts (best-effort; do not fail site)
-    if is_us:
+def site_alerts(site: Site, fetched: Any = None) -> List[AlertItem]:
+    """
+    Official alerts for a site (best-effort; never raises).
+    fetched: prefetched alert list or the exception from its fetch; None -> fetch now.
+    """
+    if is_us_site(site):
         try:
-            alerts = fetch_nws_alerts(site.lat, site.lon)
+            if fetched is None:
+                fetched = fetch_nws_alerts(site.lat, site.lon)
+            if isinstance(fetched, Exception):
+                raise fetched
+            return list(fetched)
         except Exception as e:
-            alerts = [AlertItem(title=f"(Alert fetch failed) {e}", source="NWS")]
-    elif is_ca and site.eccc_feed_url:
+            return [AlertItem(title=f"(Alert fetch failed) {e}", source="NWS")]
+    if is_ca_site(site) and site.eccc_feed_url:
         try:
-            alerts = fetch_eccc_atom_alert_titles(site.eccc_feed_url)
+            if fetched is None:
+                fetched = fetch_eccc_atom_alert_titles(site.eccc_feed_url)
+            if isinstance(fetched, Exception):
+                raise fetched
+            return list(fetched)
         except Exception as e:
-            alerts = [AlertItem(title=f"(ECCC feed fetch failed) {e}", source="ECCC(ATOM)")]
+            return [AlertItem(title=f"(ECCC feed fetch failed) {e}", source="ECCC(ATOM)")]
+    return []
+
+
+class SiteOutcome(NamedTuple):
+    """A site's alerts + accumulation before risk classification."""
+    alerts: List[AlertItem]
+    daily_snow_in: List[float]
+    daily_ice_in: List[float]
+    snow_7d_in: float
+    ice_7d_in: float
+    confidence: str
+
+    @property
+    def has_real_alerts(self) -> bool:
+        return bool(self.alerts) and not any("fetch failed" in a.title.lower() for a in self.alerts)
 
-    # Accumulation (best-effort; do not fail site)
+
+def resolve_outcome(alerts: List[AlertItem], snow_ice: Any) -> SiteOutcome:
+    """
+    snow_ice is (daily_snow_in, daily_ice_in[, snow_7d_in, ice_7d_in]), or the
+    exception raised while fetching them; a failed forecast degrades the site
+    to LOW confidence.
+    """
     confidence = "MEDIUM"
-    try:
-        daily_snow_in, daily_ice_in = fetch_open_meteo_snow_ice_7d(site.lat, site.lon)
-    except Exception as e:
-        daily_snow_in = [0.0] * 7
-        daily_ice_in = [0.0] * 7
+    if isinstance(snow_ice, Exception):
         confidence = "LOW"
         # Put the failure into alerts_titles so it's visible but not fatal
-        alerts = alerts + [AlertItem(title=f"(Open-Meteo failed) {e}", source="OPEN-METEO")]
-
-    snow_7d = compute_totals(daily_snow_in)
-    ice_7d = compute_totals(daily_ice_in)
-
-    has_real_alerts = bool(alerts) and not any("fetch failed" in a.title.lower() for a in alerts)
-
-    risk_level, risk_reason = classify_risk(snow_7d, ice_7d, has_alerts=has_real_alerts)
-
-    return SiteResult(
-        site_code=site.site_code,
-        site_name=site.site_name,
-        country=site.country,
-        prime_status=site.prime_status,
-        lat=site.lat,
-        lon=site.lon,
-        alerts=alerts,
-        snow_7d_in=snow_7d,
-        ice_7d_in=ice_7d,
-        daily_snow_in=daily_snow_in,
-        daily_ice_in=daily_ice_in,
-        risk_level=risk_level,
-        risk_reason=risk_reason,
-        confidence=confidence,
-        address=site.address,
-    )
+        alerts = alerts + [AlertItem(title=f"(Open-Meteo failed) {snow_ice}", source="OPEN-METEO")]
+        snow_ice = ([0.0] * 7, [0.0] * 7)
+
+    daily_snow_in, daily_ice_in = snow_ice[0], snow_ice[1]
+    if len(snow_ice) > 2:
+        snow_7d, ice_7d = snow_ice[2], snow_ice[3]
+    else:
+        snow_7d = compute_totals(daily_snow_in)
+        ice_7d = compute_totals(daily_ice_in)
+    return SiteOutcome(alerts, daily_snow_in, daily_ice_in, snow_7d, ice_7d, confidence)
 
 
-def main() -> int:
-    sites = load_sites_from_embedded_csv(SITES_CSV)
-    results: List[SiteResult] = []
+# =========================
+# FETCH PLANNING (dedupe co-located sites)
+# =========================
+
+def coord_key(lat: float, lon: float) -> Tuple[float, float]:
+    return (round(lat, COORD_DEDUP_DECIMALS), round(lon, COORD_DEDUP_DECIMALS))
+
 
+def snap_to_grid(lat: float, lon: float, res_deg: float) -> Tuple[float, float]:
+    """Nearest res_deg grid node to (lat, lon), i.e. sites within res_deg/2 of a node share it."""
+    if res_deg <= 0:
+        return (lat, lon)
+    return (round(round(lat / res_deg) * res_deg, 6), round(round(lon / res_deg) * res_deg, 6))
+
+
+@dataclass
+class FetchPlan:
+    """
+    Unique fetch targets for a run. Sites whose coordinates round to the same
+    point (COORD_DEDUP_DECIMALS) share one alert fetch; sites in the same
+    forecast cell (exact point, or GRID_SNAP_DEG cell) share one forecast.
+    """
+    points: List[Tuple[float, float]]           # representative (first site's) lat/lon per unique point
+    site_point: List[int]                       # site index -> index into points
+    nws_points: List[int]                       # points with at least one US site
+    nws_states: Dict[int, str]                  # US point -> state code inferred from address ("" if unknown)
+    eccc_feeds: List[str]                       # unique ECCC feed URLs (Canadian sites)
+    forecast_points: List[Tuple[float, float]]  # unique forecast coordinates
+    site_forecast: List[int]                    # site index -> index into forecast_points
+
+
+def plan_fetches(sites: List[Site], grid_snap_deg: Optional[float] = None) -> FetchPlan:
+    res = GRID_SNAP_DEG if grid_snap_deg is None else grid_snap_deg
+    index: Dict[Tuple[float, float], int] = {}
+    points: List[Tuple[float, float]] = []
+    site_point: List[int] = []
+    fc_index: Dict[Tuple[float, float], int] = {}
+    fc_points: List[Tuple[float, float]] = []
+    site_forecast: List[int] = []
+    nws: Dict[int, str] = {}
+    feeds: Dict[str, None] = {}
     for s in sites:
-        # evaluate_site is now safe (won't throw in normal API failures)
-        results.append(evaluate_site(s))
+        k = coord_key(s.lat, s.lon)
+        if k not in index:
+            index[k] = len(points)
+            points.append((s.lat, s.lon))
+        p = index[k]
+        site_point.append(p)
+
+        fc = snap_to_grid(s.lat, s.lon, res) if res > 0 else points[p]
+        fk = coord_key(*fc)
+        if fk not in fc_index:
+            fc_index[fk] = len(fc_points)
+            fc_points.append(fc)
+        site_forecast.append(fc_index[fk])
+
+        if is_us_site(s):
+            if not nws.get(p):
+                nws[p] = infer_us_state(s.address)
+        elif is_ca_site(s) and s.eccc_feed_url:
+            feeds[s.eccc_feed_url] = None
+    return FetchPlan(
+        points=points,
+        site_point=site_point,
+        nws_points=list(nws),
+        nws_states=nws,
+        eccc_feeds=list(feeds),
+        forecast_points=fc_points,
+        site_forecast=site_forecast,
+    )
+
+
+@dataclass
+class Prefetched:
+    """
+    Results of the fetch stage; every value is the fetched data or the
+    exception raised while fetching it.
+    """
+    forecasts: List[Any]        # per forecast point: fetch_open_meteo_daily() dict
+    nws_alerts: Dict[int, Any]  # plan point -> List[AlertItem]
+    eccc_alerts: Dict[str, Any]  # feed URL -> List[AlertItem]
+
+
+def fan_out(sites: List[Site], plan: FetchPlan, pre: Prefetched, snow_ice: List[Any]) -> List[SiteOutcome]:
+    """snow_ice: compute_snow_ice_fleet(pre.forecasts), aligned with plan.forecast_points."""
+    outcomes: List[SiteOutcome] = []
+    for i, s in enumerate(sites):
+        p = plan.site_point[i]
+        if is_us_site(s):
+            alerts = pre.nws_alerts.get(p)
+        else:
+            alerts = pre.eccc_alerts.get(s.eccc_feed_url)
+        outcomes.append(resolve_outcome(site_alerts(s, alerts), snow_ice[plan.site_forecast[i]]))
+    return outcomes
+
+
+# =========================
+# FETCH STAGE (thread + async engines)
+# =========================
+
+def chunked(items: List[Any], size: int) -> List[List[Any]]:
+    size = max(1, size)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def pool_mapper(pool: Optional[ThreadPoolExecutor]) -> Any:
+    """map() over the pool (or inline); each call runs in a copy of the caller's context (deadline)."""
+    if pool is None:
+        return map
+
+    def pmap(fn: Any, *iterables: Any) -> Iterator[Any]:
+        ctx = contextvars.copy_context()
+        return pool.map(lambda *args: ctx.copy().run(fn, *args), *iterables)
+
+    return pmap
+
+
+def _capture(fn: Any, *args: Any) -> Any:
+    try:
+        return fn(*args)
+    except Exception as e:
+        return e
+
+
+async def _capture_async(coro: Any) -> Any:
+    try:
+        return await coro
+    except Exception as e:
+        return e
+
+
+def _fetch_daily_point(point: Tuple[float, float]) -> Any:
+    return _capture(fetch_open_meteo_daily, point[0], point[1])
+
+
+def forecast_batch_split(err: Exception) -> bool:
+    """
+    Should a failed batch be re-fetched point by point? Yes for a malformed answer or a
+    permanent 4xx (Open-Meteo rejects the whole query over one bad location); no for
+    429, 5xx, timeouts, an open breaker or the deadline, which would hit every point alike.
+    """
+    if isinstance(err, OpenMeteoBatchShapeError):
+        return True
+    cause = root_error(err)
+    status = http_error_status(cause)
+    return status is not None and 400 <= status < 500 and not RETRY_POLICY.retryable(cause)
+
+
+def forecast_batches(points: List[Tuple[float, float]]) -> List[List[int]]:
+    """Point indexes per batch request; invalid locations are left out and fetched on their own."""
+    if OPEN_METEO_BATCH_SIZE <= 1:
+        return []
+    return chunked([i for i, (lat, lon) in enumerate(points) if valid_coord(lat, lon)], OPEN_METEO_BATCH_SIZE)
+
+
+def prefetch_open_meteo(points: List[Tuple[float, float]], pool: Optional[ThreadPoolExecutor] = None) -> List[Any]:
+    """
+    Batched forecast stage: one Open-Meteo request per OPEN_METEO_BATCH_SIZE points.
+    Returns a list aligned with points holding the daily series dict or the
+    exception for that point. Only a batch with a malformed answer or a permanent
+    4xx is re-fetched point by point (forecast_batch_split); a batch that failed
+    with 429, 5xx, a timeout, an open breaker or the deadline hands its error to
+    every point, so an outage isn't multiplied by the batch size. Invalid
+    locations never join a batch.
+    """
+    pmap = pool_mapper(pool)
+    out: List[Any] = [None] * len(points)
+    batches = forecast_batches(points)
+    if batches:
+
+        def run(idx: List[int]) -> List[Any]:
+            try:
+                return fetch_open_meteo_daily_batch([points[i] for i in idx])
+            except Exception as e:
+                return [None if forecast_batch_split(e) else e] * len(idx)
+
+        for idx, values in zip(batches, pmap(run, batches)):
+            for i, v in zip(idx, values):
+                out[i] = v
+
+    missing = [i for i, v in enumerate(out) if v is None]
+    for i, v in zip(missing, pmap(_fetch_daily_point, [points[i] for i in missing])):
+        out[i] = v
+    return out
+
+
+def prefetch_nws_alerts(plan: FetchPlan, pool: Optional[ThreadPoolExecutor] = None) -> Dict[int, Any]:
+    """
+    Alerts per US plan point. Under NWS_ALERT_MODE=area/national each feed is
+    fetched once and matched locally; a failed feed fails all of its points.
+    Zone-based alerts need the site's UGC zones: those come from POINT_ZONES,
+    so /points is only called for sites never looked up before.
+    """
+    pmap = pool_mapper(pool)
+    areas = nws_feed_areas(plan)
+    uniq = list(dict.fromkeys(areas.values()))
+    feeds = dict(zip(uniq, pmap(lambda a: _capture(fetch_nws_alert_feed, a), uniq)))
+
+    zone_errors: Dict[int, Exception] = {}
+    need = zone_lookups_needed(plan, areas, feeds)
+    for p, zones in zip(need, pmap(lambda p: _capture(fetch_nws_point_zones, *plan.points[p]), need)):
+        if isinstance(zones, Exception):
+            zone_errors[p] = zones
+        else:
+            POINT_ZONES.put(*plan.points[p], zones)
+    POINT_ZONES.save()
+
+    def one(p: int) -> Any:
+        if p not in areas:
+            return _capture(fetch_nws_alerts, *plan.points[p])
+        return match_nws_feed_point(plan, p, feeds[areas[p]], zone_errors)
+
+    return dict(zip(plan.nws_points, pmap(one, plan.nws_points)))
+
+
+def prefetch_all(sites: List[Site], plan: FetchPlan, pool: Optional[ThreadPoolExecutor] = None) -> Prefetched:
+    """
+    Forecasts and alerts run side by side (like prefetch_all_async), so a slow
+    Open-Meteo can't use up the run deadline before any alert is fetched; without
+    a pool, alerts go first.
+    """
+    pmap = pool_mapper(pool)
+
+    def forecasts() -> List[Any]:
+        with RUN_STATS.stage("forecasts"), deadline_scope(STAGE_BUDGETS.get("forecasts")):
+            return prefetch_open_meteo(plan.forecast_points, pool)
+
+    def alerts() -> Tuple[Dict[int, Any], Dict[str, Any]]:
+        with RUN_STATS.stage("alerts"), deadline_scope(STAGE_BUDGETS.get("alerts")):
+            nws = prefetch_nws_alerts(plan, pool)
+            eccc = dict(zip(plan.eccc_feeds, pmap(lambda u: _capture(fetch_eccc_atom_alert_titles, u), plan.eccc_feeds)))
+        return nws, eccc
+
+    if pool is None:
+        nws, eccc = alerts()
+        fc = forecasts()
+    else:
+        # forecasts drive their stage from a thread of their own (not a pool worker, which
+        # would wait on its own pool); both stages' requests share the pool.
+        # Stage timings overlap, so they can add up to more than the wall-clock
+        ctx = contextvars.copy_context()
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="stage") as side:
+            fut = side.submit(ctx.run, forecasts)
+            nws, eccc = alerts()
+            fc = fut.result()
+    return Prefetched(forecasts=fc, nws_alerts=nws, eccc_alerts=eccc)
+
+
+async def prefetch_open_meteo_async(client: AsyncHttpClient, points: List[Tuple[float, float]]) -> List[Any]:
+    import asyncio
+
+    out: List[Any] = [None] * len(points)
+    batches = forecast_batches(points)
+    if batches:
+
+        async def run(idx: List[int]) -> List[Any]:
+            try:
+                return await fetch_open_meteo_daily_batch_async(client, [points[i] for i in idx])
+            except Exception as e:
+                return [None if forecast_batch_split(e) else e] * len(idx)
+
+        for idx, values in zip(batches, await asyncio.gather(*(run(b) for b in batches))):
+            for i, v in zip(idx, values):
+                out[i] = v
+
+    missing = [i for i, v in enumerate(out) if v is None]
+    values = await asyncio.gather(
+        *(_capture_async(fetch_open_meteo_daily_async(client, *points[i])) for i in missing)
+    )
+    for i, v in zip(missing, values):
+        out[i] = v
+    return out
+
+
+async def prefetch_nws_alerts_async(client: AsyncHttpClient, plan: FetchPlan) -> Dict[int, Any]:
+    import asyncio
+
+    areas = nws_feed_areas(plan)
+    uniq = list(dict.fromkeys(areas.values()))
+    feeds = dict(zip(uniq, await asyncio.gather(
+        *(_capture_async(fetch_nws_alert_feed_async(client, a)) for a in uniq)
+    )))
+
+    zone_errors: Dict[int, Exception] = {}
+    need = zone_lookups_needed(plan, areas, feeds)
+    looked_up = await asyncio.gather(
+        *(_capture_async(fetch_nws_point_zones_async(client, *plan.points[p])) for p in need)
+    )
+    for p, zones in zip(need, looked_up):
+        if isinstance(zones, Exception):
+            zone_errors[p] = zones
+        else:
+            POINT_ZONES.put(*plan.points[p], zones)
+    POINT_ZONES.save()
+
+    async def one(p: int) -> Any:
+        if p not in areas:
+            return await _capture_async(fetch_nws_alerts_async(client, *plan.points[p]))
+        return match_nws_feed_point(plan, p, feeds[areas[p]], zone_errors)
+
+    return dict(zip(plan.nws_points, await asyncio.gather(*(one(p) for p in plan.nws_points))))
+
+
+async def _timed_stage(name: str, coro: Any, budget: Optional[float] = None) -> Any:
+    t0 = time.perf_counter()
+    try:
+        with deadline_scope(budget):
+            return await coro
+    finally:
+        RUN_STATS.add_stage(name, time.perf_counter() - t0)
+
+
+async def _gather_eccc_async(client: AsyncHttpClient, feeds: List[str]) -> List[Any]:
+    import asyncio
+
+    # a coroutine (not a bare gather future), so its tasks start inside the stage's deadline scope
+    return await asyncio.gather(*(_capture_async(fetch_eccc_atom_alert_titles_async(client, u)) for u in feeds))
+
+
+async def prefetch_all_async(client: AsyncHttpClient, sites: List[Site], plan: FetchPlan) -> Prefetched:
+    import asyncio
+
+    # Stages overlap on the event loop, so their timings can add up to more than the wall-clock
+    forecasts, nws, eccc = await asyncio.gather(
+        _timed_stage("forecasts", prefetch_open_meteo_async(client, plan.forecast_points), STAGE_BUDGETS.get("forecasts")),
+        _timed_stage("alerts", prefetch_nws_alerts_async(client, plan), STAGE_BUDGETS.get("alerts")),
+        _timed_stage("alerts_eccc", _gather_eccc_async(client, plan.eccc_feeds), STAGE_BUDGETS.get("alerts")),
+    )
+    return Prefetched(
+        forecasts=forecasts,
+        nws_alerts=nws,
+        eccc_alerts=dict(zip(plan.eccc_feeds, eccc)),
+    )
+
+
+def evaluate_sites(sites: List[Site]) -> ResultTable:
+    """
+    Plan unique fetches, run them on a bounded worker pool (MAX_WORKERS threads),
+    then fan results out to every site. Results are returned in input order so
+    reports stay deterministic.
+    """
+    with RUN_STATS.stage("plan"):
+        plan = plan_fetches(sites)
+    workers = max(1, min(MAX_WORKERS, len(plan.points)))
+    if workers == 1:
+        pre = prefetch_all(sites, plan)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # fetchers are wrapped so one slow/broken point never takes down the others
+            pre = prefetch_all(sites, plan, pool)
+    return finish_sites(sites, plan, pre)
+
+
+def finish_sites(sites: List[Site], plan: FetchPlan, pre: Prefetched) -> ResultTable:
+    with RUN_STATS.stage("compute"):
+        snow_ice = compute_snow_ice_fleet(pre.forecasts)
+    with RUN_STATS.stage("evaluate"):
+        outcomes = fan_out(sites, plan, pre, snow_ice)
+    with RUN_STATS.stage("classify"):
+        risks = classify_risk_fleet(
+            [o.snow_7d_in for o in outcomes],
+            [o.ice_7d_in for o in outcomes],
+            [o.has_real_alerts for o in outcomes],
+            sites,
+        )
+    with RUN_STATS.stage("assemble"):
+        return ResultTable.from_outcomes(
+            sites, outcomes, risks, [plan.forecast_points[k] for k in plan.site_forecast]
+        )
+
+
+def evaluate_sites_async(sites: List[Site]) -> ResultTable:
+    """
+    Same pipeline as evaluate_sites, with the fetch stage on a single event loop;
+    ASYNC_MAX_CONCURRENCY bounds the number of in-flight requests.
+    """
+    import asyncio
+
+    try:
+        import aiohttp
+    except ImportError as e:
+        raise RuntimeError("ENGINE=async requires aiohttp (pip install aiohttp)") from e
+
+    with RUN_STATS.stage("plan"):
+        plan = plan_fetches(sites)
+
+    async def run() -> Prefetched:
+        timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+        # limit_per_host stays open: ASYNC_MAX_CONCURRENCY already caps in-flight requests
+        connector = aiohttp.TCPConnector(limit=ASYNC_MAX_CONCURRENCY, keepalive_timeout=HTTP_KEEPALIVE_SEC)
+        async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+            client = AsyncHttpClient(session, ASYNC_MAX_CONCURRENCY)
+            return await prefetch_all_async(client, sites, plan)
+
+    return finish_sites(sites, plan, asyncio.run(run()))
 
-    md = render_markdown(results)
-    with open(OUT_MD, "w", encoding="utf-8") as f:
-        f.write(md)
-    write_csv(results, OUT_CSV)
 
-    flagged = [r for r in results if r.risk_level != "NONE"]
-    critical = [r for r in results if r.risk_level == "CRITICAL"]
-    warning = [r for r in results if r.risk_level == "WARNING"]
-    heads = [r for r in results if r.risk_level == "HEADSUP"]
+# =========================
+# CLI / MAIN
+# =========================
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Severe Weather Monitor (rolling 7-day)")
+    p.add_argument("--engine", choices=["thread", "async"], default=ENGINE if ENGINE in ("thread", "async") else "thread",
+                   help="fetch engine (default: ENGINE env or 'thread')")
+    p.add_argument("--sites", metavar="PATH", default=SITES_FILE,
+                   help="site registry (.csv/.json/.parquet); default: SITES_FILE env or the embedded list")
+    p.add_argument("--incremental", action="store_true", default=INCREMENTAL,
+                   help="re-fetch only sites due per REFRESH_*_MIN, reuse LAST_RESULTS_FILE for the rest")
+    p.add_argument("--daemon", action="store_true",
+                   help="stay running: runs at DAEMON_RUN_TIMES (LOCAL_TZ_LABEL) plus on new alerts")
+    p.add_argument("--trend", metavar="SITE_CODE", default="",
+                   help="print the site's 7-day totals over recent archived runs (ARCHIVE_DB) and exit")
+    p.add_argument("--runs", type=int, default=10, help="number of runs for --trend (default: 10)")
+    return p.parse_args(argv)
+
+
+def evaluate_fleet(sites: List[Site], engine: str = "thread") -> ResultTable:
+    if engine == "async":
+        return evaluate_sites_async(sites)
+    return evaluate_sites(sites)
+
+
+def run_monitor(
+    sites: List[Site], engine: str = "thread", incremental: bool = False, force: Optional[set] = None
+) -> ResultTable:
+    """
+    One full run for the given sites: fetch + evaluate (only the due sites, plus
+    the indices in force, when incremental), write the reports (and the ARCHIVE_DB
+    history), send notifications, prune the HTTP cache. RUN_STATS holds the run's
+    request counts and stage timings. RUN_DEADLINE_SEC bounds the whole run.
+    """
+    with deadline_scope(RUN_DEADLINE_SEC):
+        return _run_monitor(sites, engine, incremental, force)
+
+
+def _run_monitor(sites: List[Site], engine: str, incremental: bool, force: Optional[set]) -> ResultTable:
+    RUN_STATS.reset()
+    HEDGER.reset_run()
+    run_time = dt.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+    with deadline_scope(FETCH_BUDGET_SEC):
+        if incremental:
+            results = refresh_sites(sites, engine, LAST_RESULTS_FILE, force)
+        else:
+            results = evaluate_fleet(sites, engine)
+    if RUN_STATS.events.get("deadline"):
+        print("Run deadline reached: unfinished sites are reported with LOW confidence")
+
+    # reports are always written; the rest is bounded by what is left of RUN_DEADLINE_SEC
+    with RUN_STATS.stage("reports"):
+        md = render_markdown(results)
+        with open(OUT_MD, "w", encoding="utf-8") as f:
+            f.write(md)
+        write_csv(results, OUT_CSV)
+
+    if ARCHIVE_DB:
+        with RUN_STATS.stage("archive"):
+            try:
+                conn = archive_connect(ARCHIVE_DB)
+                try:
+                    archive_run(conn, results, run_time, engine)
+                finally:
+                    conn.close()
+            except Exception as e:
+                print(f"Archive write failed: {e}")
+
+    with RUN_STATS.stage("notify"), deadline_scope(NOTIFY_BUDGET_SEC):
+        if STATE_FILE:
+            changes, state = diff_run_state(load_run_state(STATE_FILE), results)
+            # state only advances once the changes went out, so a failed send is retried next run
+            if notify(results, changes):
+                save_run_state(STATE_FILE, state, run_time)
+        else:
+            notify(results)
+
+    if HTTP_CACHE_DIR:
+        with RUN_STATS.stage("cache_prune"):
+            http_cache_prune()
+    return results
+
+
+def notify(results: Union[ResultTable, List[SiteResult]], changes: Optional[List[SiteChange]] = None) -> bool:
+    """
+    Send the run summary (Teams / email). With changes (STATE_FILE mode) only the
+    per-site changes are sent, and nothing at all when the list is empty.
+    Returns False if any configured channel failed.
+    """
+    t = as_result_table(results)
+    n_critical = int(t.risk_mask("CRITICAL").sum())
+    n_warning = int(t.risk_mask("WARNING").sum())
+    n_heads = int(t.risk_mask("HEADSUP").sum())
+    flagged = ~t.risk_mask("NONE")
 
-    subject = f"{EMAIL_SUBJECT_PREFIX}{len(critical)} Critical, {len(warning)} Warning, {len(heads)} Heads-up"
+    subject = f"{EMAIL_SUBJECT_PREFIX}{n_critical} Critical, {n_warning} Warning, {n_heads} Heads-up"
 
     lines: List[str] = []
-    if not flagged:
+    if changes is not None:
+        if not changes:
+            print("No risk or alert changes since the previous run; notifications skipped.")
+            return True
+        subject += f" ({len(changes)} changed)"
+        lines = change_lines(t, changes)
+    elif not flagged.any():
         lines.append("No sites flagged.")
     else:
         order = {"CRITICAL": 0, "WARNING": 1, "HEADSUP": 2, "NONE": 9}
-        top = sorted(flagged, key=lambda x: (order.get(x.risk_level, 9), -(x.snow_7d_in + x.ice_7d_in), x.site_code))[:12]
-        for r in top:
+        level_rank = t.risk_level.ranks(key=lambda v: order.get(v, 9))
+        top = t.order(flagged, level_rank, -(t.snow_7d_in + t.ice_7d_in), t.code_ranks())[:12]
+        counts = t.alerts_count()
+        for i in top:
             lines.append(
-                f"- {r.risk_level}: {r.site_code} {r.site_name} | Snow {fmt_in(r.snow_7d_in)} in | Ice {fmt_in(r.ice_7d_in)} in | Alerts {'YES' if r.alerts else 'NO'}"
+                f"- {t.risk_level[i]}: {t.site_code[i]} {t.site_name[i]} | Snow {fmt_in(float(t.snow_7d_in[i]))} in | Ice {fmt_in(float(t.ice_7d_in[i]))} in | Alerts {'YES' if counts[i] else 'NO'}"
             )
     notify_body = "\n".join(lines) + f"\n\n(Full report written to {OUT_MD} and {OUT_CSV}.)\n"
 
+    ok = True
     try:
         if TEAMS_WEBHOOK_URL:
             send_teams(TEAMS_WEBHOOK_URL, subject, notify_body)
     except Exception as e:
+        ok = False
         print(f"Teams notification failed: {e}")
 
     try:
         if SMTP_HOST and EMAIL_TO and EMAIL_FROM:
             send_email(subject, notify_body)
     except Exception as e:
+        ok = False
         print(f"Email notification failed: {e}")
+    return ok
+
+
+def change_lines(t: ResultTable, changes: List[SiteChange], limit: int = 20) -> List[str]:
+    lines: List[str] = []
+    for c in changes[:limit]:
+        i = c.idx
+        head = f"{c.old_level} -> {c.new_level}" if c.kind != "ALERTS" else c.new_level
+        lines.append(
+            f"- {c.kind} {head}: {t.site_code[i]} {t.site_name[i]} | Snow {fmt_in(float(t.snow_7d_in[i]))} in | Ice {fmt_in(float(t.ice_7d_in[i]))} in"
+        )
+        lines.extend(f"  - new alert: {title}" for title in c.new_alerts[:5])
+        lines.extend(f"  - cleared: {title}" for title in c.cleared_alerts[:5])
+    if len(changes) > limit:
+        lines.append(f"- ... and {len(changes) - limit} more site(s) changed")
+    return lines
 
+
+# =========================
+# DAEMON (--daemon: in-process scheduler)
+# =========================
+# Keeps the process warm between runs (HTTP session + cache, parsed sites, fetch plan).
+# Runs at DAEMON_RUN_TIMES wall-clock in LOCAL_TZ_LABEL, so DST is handled by zoneinfo
+# instead of fixed UTC cron entries, and polls alerts in between: a site gaining an
+# alert triggers an extra run.
+
+def parse_run_times(spec: str) -> List[Tuple[int, int]]:
+    times: List[Tuple[int, int]] = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            hh, mm = part.split(":")
+            h, m = int(hh), int(mm)
+            if not (0 <= h < 24 and 0 <= m < 60):
+                raise ValueError(part)
+        except ValueError:
+            print(f"Ignoring bad DAEMON_RUN_TIMES entry: {part!r} (expected HH:MM)")
+            continue
+        times.append((h, m))
+    return sorted(set(times))
+
+
+def next_scheduled_run(now: dt.datetime, times: List[Tuple[int, int]], tz: dt.tzinfo) -> dt.datetime:
+    """
+    First HH:MM local time after now (aware), as UTC. A time skipped by a spring-forward
+    gap runs at the shifted instant; a time repeated on fall-back runs once (fold=0).
+    """
+    local_day = now.astimezone(tz).date()
+    for offset in range(3):
+        day = local_day + dt.timedelta(days=offset)
+        for h, m in times:
+            cand = dt.datetime(day.year, day.month, day.day, h, m, tzinfo=tz).astimezone(dt.timezone.utc)
+            if cand > now:
+                return cand
+    raise ValueError("no run times configured")
+
+
+def poll_site_alert_ids(sites: List[Site], plan: FetchPlan) -> List[Optional[frozenset]]:
+    """Current alert ids per site (None where the fetch failed); alerts only, no forecasts."""
+    workers = max(1, min(MAX_WORKERS, len(plan.points)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        nws = prefetch_nws_alerts(plan, pool)
+        eccc = dict(zip(plan.eccc_feeds, pool_mapper(pool)(lambda u: _capture(fetch_eccc_atom_alert_titles, u), plan.eccc_feeds)))
+    out: List[Optional[frozenset]] = []
+    for i, s in enumerate(sites):
+        fetched = nws.get(plan.site_point[i]) if is_us_site(s) else eccc.get(s.eccc_feed_url)
+        if fetched is None:
+            out.append(frozenset())
+        elif isinstance(fetched, Exception):
+            out.append(None)
+        else:
+            out.append(frozenset(a.id for a in fetched if a.id))
+    return out
+
+
+def result_alert_ids(results: ResultTable) -> List[Optional[frozenset]]:
+    out: List[Optional[frozenset]] = []
+    for i in range(len(results)):
+        if any("fetch failed" in title.lower() for title in results.alert_titles(i)):
+            out.append(None)
+        else:
+            out.append(frozenset(a_id for a_id in results.alert_ids(i) if a_id))
+    return out
+
+
+def run_daemon(sites: List[Site], engine: str = "thread", incremental: bool = False) -> int:
+    from zoneinfo import ZoneInfo
+
+    try:
+        tz: dt.tzinfo = ZoneInfo(LOCAL_TZ_LABEL)
+    except Exception as e:
+        print(f"Unknown LOCAL_TZ_LABEL {LOCAL_TZ_LABEL!r} ({e}); scheduling in UTC")
+        tz = dt.timezone.utc
+    times = parse_run_times(DAEMON_RUN_TIMES)
+    if not times:
+        print("DAEMON_RUN_TIMES has no valid HH:MM entries")
+        return 2
+    plan = plan_fetches(sites)
+    known: List[Optional[frozenset]] = [None] * len(sites)
+
+    def run(reason: str, force: Optional[set] = None) -> None:
+        print(f"[{dt.datetime.now(tz):%Y-%m-%d %H:%M %Z}] run ({reason})")
+        try:
+            results = run_monitor(sites, engine, incremental, force)
+        except Exception as e:
+            print(f"Run failed: {e}")
+            return
+        print(RUN_STATS.summary())
+        for i, ids in enumerate(result_alert_ids(results)):
+            if ids is not None:
+                known[i] = ids
+
+    poll_sec = DAEMON_ALERT_POLL_MIN * 60
+    try:
+        run("startup")
+        now = dt.datetime.now(dt.timezone.utc)
+        next_run = next_scheduled_run(now, times, tz)
+        next_poll = time.monotonic() + poll_sec
+        print(f"Next scheduled run: {next_run.astimezone(tz):%Y-%m-%d %H:%M %Z}")
+        while True:
+            now = dt.datetime.now(dt.timezone.utc)
+            if now >= next_run:
+                run("scheduled")
+                next_run = next_scheduled_run(dt.datetime.now(dt.timezone.utc), times, tz)
+                next_poll = time.monotonic() + poll_sec
+                print(f"Next scheduled run: {next_run.astimezone(tz):%Y-%m-%d %H:%M %Z}")
+            elif poll_sec > 0 and time.monotonic() >= next_poll:
+                try:
+                    polled = poll_site_alert_ids(sites, plan)
+                except Exception as e:
+                    print(f"Alert poll failed: {e}")
+                    polled = []
+                new = {i for i, ids in enumerate(polled) if ids is not None and ids - (known[i] or frozenset())}
+                if new:
+                    run(f"new alerts at {len(new)} site(s)", new)
+                next_poll = time.monotonic() + poll_sec
+            # short sleeps keep the wall-clock schedule honest across suspend / clock changes
+            wait = (next_run - dt.datetime.now(dt.timezone.utc)).total_seconds()
+            if poll_sec > 0:
+                wait = min(wait, next_poll - time.monotonic())
+            time.sleep(min(max(wait, 0.0), 60.0))
+    except KeyboardInterrupt:
+        print("Daemon stopped")
+        return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.trend:
+        if not ARCHIVE_DB:
+            print("--trend needs ARCHIVE_DB set")
+            return 2
+        print_trend(ARCHIVE_DB, args.trend, args.runs)
+        return 0
+    sites = load_sites(args.sites)
+    if args.daemon:
+        return run_daemon(sites, args.engine, args.incremental)
+    run_monitor(sites, args.engine, args.incremental)
     print(f"Wrote {OUT_MD} and {OUT_CSV}")
+    print(RUN_STATS.summary())
     return 0
 
 